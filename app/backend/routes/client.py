@@ -1,7 +1,7 @@
 # app/backend/routes/client.py
 from fastapi import APIRouter, Request, Form
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
+from app.core.templating import templates
 from starlette.status import HTTP_302_FOUND
 from typing import List, Optional
 from datetime import datetime
@@ -9,7 +9,6 @@ from datetime import datetime
 from app.db import prisma  # ✅ shared instance
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/admin/clients")
 async def list_clients(request: Request):
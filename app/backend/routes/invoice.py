@@ -1,13 +1,12 @@
 # app/backend/routes/invoice.py
 from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse
-from fastapi.templating import Jinja2Templates
+from app.core.templating import templates
 from app.utils.email_sender import send_invoice_email
 from app.db import prisma  # ✅ shared
 import os
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/admin/invoice/send/{invoice_id}")
 async def send_invoice_to_client(request: Request, invoice_id: str):
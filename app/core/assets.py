@@ -0,0 +1,196 @@
+# app/core/assets.py
+"""
+Fingerprinted, precompressed static assets.
+
+Build step (run after `python -m app.core.images`):
+
+    python -m app.core.assets
+
+copies every file under app/static into app/static/dist/ with a content hash in its
+name, writes .gz (and .br when the Brotli package is installed) next to text assets,
+and records it all in dist/manifest.json. CSS url(/static/...) references are rewritten
+to the hashed names. Templates resolve names with asset_url('css/style.css');
+AssetFiles serves hashed files with the best Accept-Encoding and an immutable
+Cache-Control; invoice PDFs under invoices/ get "private, no-store". Without a build, asset_url returns the plain /static path.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+STATIC_DIR = Path(__file__).resolve().parents[1] / "static"
+DIST = "dist"
+MANIFEST_PATH = STATIC_DIR / DIST / "manifest.json"
+
+# Generated at runtime (invoice PDFs) or already content-hashed (image variants).
+SKIP_DIRS = {DIST, "invoices", "img"}
+HASHED_PREFIXES = (f"{DIST}/", "img/")
+COMPRESSIBLE = {".css", ".js", ".mjs", ".svg", ".json", ".txt", ".xml", ".map", ".ico", ".html"}
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+STATIC_CACHE_CONTROL = os.getenv("STATIC_CACHE_CONTROL", "public, max-age=3600")
+# Customer invoice PDFs must never sit in a shared cache or proxy.
+PRIVATE_PREFIXES = ("invoices/",)
+PRIVATE_CACHE_CONTROL = "private, no-store"
+
+_CSS_URL = re.compile(r"""url\((['"]?)/static/([^'")?#]+)([^'")]*)\1\)""")
+
+
+# ---------- Template helper
+@lru_cache(maxsize=1)
+def _manifest() -> dict:
+    try:
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+@lru_cache(maxsize=1)
+def _encodings_by_url() -> dict[str, list[str]]:
+    return {e["url"].removeprefix("/static/"): e["encodings"] for e in _manifest().values()}
+
+
+def asset_url(path: str) -> str:
+    """'/static/css/style.css' or 'css/style.css' → the fingerprinted URL when built."""
+    rel = path.removeprefix("/static/").lstrip("/")
+    entry = _manifest().get(rel)
+    return entry["url"] if entry else f"/static/{rel}"
+
+
+# ---------- Serving
+def _accepted(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            if params and float(q) <= 0:
+                continue
+        except ValueError:
+            pass
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class AssetFiles(StaticFiles):
+    """StaticFiles that serves precompressed, immutably cached copies of built assets."""
+
+    async def get_response(self, path: str, scope) -> Response:
+        rel = path.replace(os.sep, "/")
+        if not rel.startswith(HASHED_PREFIXES) or rel.endswith("manifest.json"):
+            response = await super().get_response(path, scope)
+            if rel.startswith(PRIVATE_PREFIXES):
+                response.headers["Cache-Control"] = PRIVATE_CACHE_CONTROL
+            elif response.status_code in (200, 304):
+                response.headers.setdefault("Cache-Control", STATIC_CACHE_CONTROL)
+            return response
+
+        encodings = _encodings_by_url().get(rel, [])
+        if encodings:
+            request_headers = Headers(scope=scope)
+            accepted = _accepted(request_headers.get("accept-encoding", ""))
+            for enc in encodings:                       # stored best-first: br, gzip
+                if enc in accepted:
+                    full = os.path.join(self.directory, rel + (".br" if enc == "br" else ".gz"))
+                    try:
+                        stat = os.stat(full)
+                    except OSError:
+                        break
+                    response = FileResponse(
+                        full, stat_result=stat,
+                        media_type=mimetypes.guess_type(rel)[0] or "application/octet-stream",
+                        headers={"Content-Encoding": enc, "Vary": "Accept-Encoding",
+                                 "Cache-Control": IMMUTABLE},
+                    )
+                    if self.is_not_modified(response.headers, request_headers):
+                        return NotModifiedResponse(response.headers)
+                    return response
+
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers["Cache-Control"] = IMMUTABLE
+            if encodings:
+                response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+
+# ---------- Build step
+def _sources():
+    for root, dirs, files in os.walk(STATIC_DIR):
+        rel_root = Path(root).relative_to(STATIC_DIR)
+        if rel_root == Path("."):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for name in sorted(files):
+            yield (rel_root / name).as_posix()
+
+
+def _compress(path: Path) -> list[str]:
+    data = path.read_bytes()
+    out = []
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    if brotli is not None:
+        packed = brotli.compress(data, quality=11)
+        if len(packed) < len(data) * 0.95:
+            Path(f"{path}.br").write_bytes(packed)
+            out.append("br")
+    packed = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(packed) < len(data) * 0.95:
+        Path(f"{path}.gz").write_bytes(packed)
+        out.append("gzip")
+    return out
+
+
+def build() -> dict:
+    dist = STATIC_DIR / DIST
+    shutil.rmtree(dist, ignore_errors=True)
+    dist.mkdir(parents=True)
+    sources = list(_sources())
+    # Non-CSS first so stylesheets can point at the hashed names of what they reference.
+    sources.sort(key=lambda rel: rel.endswith(".css"))
+
+    manifest: dict = {}
+    for rel in sources:
+        data = (STATIC_DIR / rel).read_bytes()
+        if rel.endswith(".css"):
+            def swap(m):
+                hashed = manifest.get(m.group(2), {}).get("url", f"/static/{m.group(2)}")
+                return f"url({m.group(1)}{hashed}{m.group(3)}{m.group(1)})"
+            data = _CSS_URL.sub(swap, data.decode("utf-8")).encode("utf-8")
+        p = Path(rel)
+        digest = hashlib.sha256(data).hexdigest()[:10]
+        hashed_rel = (p.parent / f"{p.stem}.{digest}{p.suffix}").as_posix()
+        target = dist / hashed_rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        encodings = _compress(target) if p.suffix.lower() in COMPRESSIBLE else []
+        manifest[rel] = {"url": f"/static/{DIST}/{hashed_rel}", "encodings": encodings}
+
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+    _manifest.cache_clear()
+    _encodings_by_url.cache_clear()
+    return manifest
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    result = build()
+    compressed = sum(1 for e in result.values() if e["encodings"])
+    print(f"Fingerprinted {len(result)} assets ({compressed} precompressed) into "
+          f"{STATIC_DIR / DIST} in {time.perf_counter() - started:.2f}s")
+    sys.exit(0)
@@ -0,0 +1,79 @@
+# app/core/client_search.py
+"""
+Client lookup for typeahead fields: case-insensitive substring match on name, surname,
+email and phone. Each column has a pg_trgm GIN index (see schema.prisma), so the
+ILIKE '%q%' filter is an index scan, not a full table scan.
+Ranking happens in SQL over all matches, so exact and prefix hits come first.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from app.db import prisma
+
+SEARCH_FIELDS = ("name", "surname", "email", "phone")
+MIN_QUERY = 2
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+
+def _like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _search_sql(n_terms: int) -> str:
+    """
+    Every term must match some field; rows are ordered by match quality across all
+    matches (exact 3, prefix 2, substring 1 per term, then trigram similarity), so an
+    old client with an exact hit still beats newer substring hits.
+    Params per term i: $3i+1 '%t%', $3i+2 't%', $3i+3 't'; the last param is the limit.
+    """
+    where, score, similar = [], [], []
+    for i in range(n_terms):
+        contains, prefix, exact = f"${3 * i + 1}", f"${3 * i + 2}", f"${3 * i + 3}"
+        where.append("(" + " OR ".join(f'"{f}" ILIKE {contains}' for f in SEARCH_FIELDS) + ")")
+        score.append(
+            "CASE WHEN " + " OR ".join(f'lower("{f}") = {exact}' for f in SEARCH_FIELDS) + " THEN 3"
+            " WHEN " + " OR ".join(f'"{f}" ILIKE {prefix}' for f in SEARCH_FIELDS) + " THEN 2 ELSE 1 END"
+        )
+        similar.append("GREATEST(" + ", ".join(f'similarity("{f}", {exact})' for f in SEARCH_FIELDS) + ")")
+    return (
+        'SELECT "id" FROM "User"'
+        f" WHERE {' AND '.join(where)}"
+        f" ORDER BY ({' + '.join(score)}) DESC, ({' + '.join(similar)}) DESC, \"createdAt\" DESC"
+        f" LIMIT ${3 * n_terms + 1}::int"
+    )
+
+
+async def search_clients(q: str, limit: Optional[int] = None) -> list:
+    """Top `limit` users matching every whitespace-separated term of `q` in any field, best first."""
+    terms = [t for t in (q or "").lower().split() if t][:4]
+    if not terms or len(" ".join(terms)) < MIN_QUERY:
+        return []
+    try:
+        n = max(1, min(MAX_LIMIT, int(limit))) if limit is not None else DEFAULT_LIMIT
+    except (TypeError, ValueError):
+        n = DEFAULT_LIMIT
+
+    params: list = []
+    for t in terms:
+        params += [f"%{_like(t)}%", f"{_like(t)}%", t]
+    rows = await prisma.query_raw(_search_sql(len(terms)), *params, n)
+    ids = [r["id"] for r in rows]
+    if not ids:
+        return []
+    users = {u.id: u for u in await prisma.user.find_many(where={"id": {"in": ids}})}
+    return [users[i] for i in ids if i in users]
+
+
+def client_json(user) -> dict:
+    return {
+        "id": user.id,
+        "name": user.name,
+        "surname": user.surname,
+        "email": user.email,
+        "phone": user.phone,
+        "address": user.address or "",
+        "clientType": user.clientType,
+        "status": user.status,
+    }
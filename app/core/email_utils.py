@@ -1,8 +1,10 @@
 # app/core/email_utils.py
-import os, smtplib, ssl, mimetypes, base64
+import os, smtplib, ssl, mimetypes, base64, threading, time
 from email.message import EmailMessage
 from typing import Iterable, Optional
 
+from app.core import offload
+
 SMTP_HOST = os.getenv("SMTP_HOST")
 SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
 SMTP_USER = os.getenv("SMTP_USER")
@@ -11,10 +13,141 @@ FROM_EMAIL = os.getenv("FROM_EMAIL") or SMTP_USER
 
 RESEND_API_KEY = os.getenv("RESEND_API_KEY")
 
-def _send_via_smtp(to_email: str, subject: str, html: str, attachments: Optional[Iterable[str]] = None):
-    if not (SMTP_HOST and SMTP_PORT and SMTP_USER and SMTP_PASS and FROM_EMAIL):
-        raise RuntimeError("SMTP is not configured. Set SMTP_HOST/SMTP_PORT/SMTP_USER/SMTP_PASS/FROM_EMAIL.")
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+SMTP_MAX_MESSAGES_PER_CONN = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONN", "100"))
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", "60"))
+
+
+class _PooledConnection:
+    __slots__ = ("smtp", "sent", "last_used")
+
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    """
+    Keeps up to `size` authenticated SMTP sessions open and hands them out per message.
+    Thread-safe, so the scheduler thread and request handlers can share one pool.
+    Idle sessions are NOOP-checked before reuse, dropped after `idle_timeout`
+    seconds, and recycled after `max_messages` messages.
+    """
+
+    def __init__(self, host: str, port: int, user: str, password: str,
+                 size: int = 4, max_messages: int = 100, idle_timeout: float = 60.0):
+        self.host, self.port, self.user, self.password = host, port, user, password
+        self.max_messages = max(1, max_messages)
+        self.idle_timeout = idle_timeout
+        self._idle: list[_PooledConnection] = []
+        self._slots = threading.BoundedSemaphore(max(1, size))
+        self._lock = threading.Lock()
+
+    def _connect(self) -> _PooledConnection:
+        s = smtplib.SMTP(self.host, self.port, timeout=30)
+        try:
+            s.ehlo()
+            s.starttls(context=ssl.create_default_context())
+            s.ehlo()
+            s.login(self.user, self.password)
+        except Exception:
+            self._quit(s)
+            raise
+        return _PooledConnection(s)
+
+    @staticmethod
+    def _quit(smtp: smtplib.SMTP) -> None:
+        try:
+            smtp.quit()
+        except Exception:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    def _is_usable(self, conn: _PooledConnection) -> bool:
+        if conn.sent >= self.max_messages:
+            return False
+        if time.monotonic() - conn.last_used > self.idle_timeout:
+            return False
+        try:
+            return conn.smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _checkout(self) -> _PooledConnection:
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._connect()
+            if self._is_usable(conn):
+                return conn
+            self._quit(conn.smtp)
+
+    def _checkin(self, conn: _PooledConnection) -> None:
+        conn.last_used = time.monotonic()
+        if conn.sent >= self.max_messages:
+            self._quit(conn.smtp)
+            return
+        with self._lock:
+            self._idle.append(conn)
+
+    def send(self, msg: EmailMessage) -> None:
+        with self._slots:
+            conn = self._checkout()
+            try:
+                conn.smtp.send_message(msg)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                # Server dropped a session that looked healthy; retry once on a fresh one.
+                self._quit(conn.smtp)
+                conn = self._connect()
+                try:
+                    conn.smtp.send_message(msg)
+                except Exception:
+                    self._quit(conn.smtp)
+                    raise
+            except Exception:
+                self._quit(conn.smtp)
+                raise
+            conn.sent += 1
+            self._checkin(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._quit(conn.smtp)
+
+
+_smtp_pool: Optional[SMTPPool] = None
+_smtp_pool_lock = threading.Lock()
 
+
+def _get_smtp_pool() -> SMTPPool:
+    global _smtp_pool
+    with _smtp_pool_lock:
+        if _smtp_pool is None:
+            _smtp_pool = SMTPPool(
+                SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS,
+                size=SMTP_POOL_SIZE,
+                max_messages=SMTP_MAX_MESSAGES_PER_CONN,
+                idle_timeout=SMTP_IDLE_TIMEOUT,
+            )
+        return _smtp_pool
+
+
+def close_smtp_pool() -> None:
+    """Close idle pooled SMTP sessions (call on shutdown)."""
+    global _smtp_pool
+    with _smtp_pool_lock:
+        pool, _smtp_pool = _smtp_pool, None
+    if pool is not None:
+        pool.close()
+
+
+def _build_message(to_email: str, subject: str, html: str, attachments: Optional[Iterable[str]] = None) -> EmailMessage:
     msg = EmailMessage()
     msg["From"] = FROM_EMAIL
     msg["To"] = to_email
@@ -29,22 +162,20 @@ def _send_via_smtp(to_email: str, subject: str, html: str, attachments: Optional
         maintype, subtype = (ctype or "application/octet-stream").split("/", 1)
         with open(p, "rb") as f:
             msg.add_attachment(f.read(), maintype=maintype, subtype=subtype, filename=os.path.basename(p))
+    return msg
 
-    context = ssl.create_default_context()
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30) as s:
-        s.ehlo()
-        s.starttls(context=context)
-        s.login(SMTP_USER, SMTP_PASS)
-        s.send_message(msg)
+def _send_via_smtp(to_email: str, subject: str, html: str, attachments: Optional[Iterable[str]] = None):
+    if not (SMTP_HOST and SMTP_PORT and SMTP_USER and SMTP_PASS and FROM_EMAIL):
+        raise RuntimeError("SMTP is not configured. Set SMTP_HOST/SMTP_PORT/SMTP_USER/SMTP_PASS/FROM_EMAIL.")
 
-def _send_via_resend(to_email: str, subject: str, html: str, attachments: Optional[Iterable[str]] = None):
-    if not RESEND_API_KEY:
-        raise RuntimeError("RESEND_API_KEY not set")
-    try:
-        import httpx
-    except ImportError:
-        raise RuntimeError("httpx missing; pip install httpx")
+    _get_smtp_pool().send(_build_message(to_email, subject, html, attachments))
+
+RESEND_URL = "https://api.resend.com/emails"
+RESEND_BATCH_URL = "https://api.resend.com/emails/batch"
+RESEND_BATCH_MAX = 100  # Resend limit; batch sends do not support attachments
 
+
+def _resend_payload(to_email: str, subject: str, html: str, attachments: Optional[Iterable[str]] = None) -> dict:
     files_json = []
     for p in attachments or []:
         if p and os.path.exists(p):
@@ -63,20 +194,98 @@ def _send_via_resend(to_email: str, subject: str, html: str, attachments: Option
     }
     if files_json:
         payload["attachments"] = files_json
+    return payload
 
+def _send_via_resend(to_email: str, subject: str, html: str, attachments: Optional[Iterable[str]] = None):
+    if not RESEND_API_KEY:
+        raise RuntimeError("RESEND_API_KEY not set")
+    try:
+        import httpx
+    except ImportError:
+        raise RuntimeError("httpx missing; pip install httpx")
+
+    payload = _resend_payload(to_email, subject, html, attachments)
     headers = {"Authorization": f"Bearer {RESEND_API_KEY}"}
     with httpx.Client(timeout=30) as client:
-        r = client.post("https://api.resend.com/emails", json=payload, headers=headers)
+        r = client.post(RESEND_URL, json=payload, headers=headers)
         r.raise_for_status()
-# app/core/email_utils.py
-def send_email(to_email: str, subject: str, html: str, attachments: list[str] | None = None):
+
+def current_provider() -> str:
     provider = (os.getenv("EMAIL_PROVIDER") or "").lower()
     if not provider:
         provider = "smtp" if SMTP_HOST else ("resend" if RESEND_API_KEY else "")
     print(f"[mail] provider={provider} from={FROM_EMAIL} host={SMTP_HOST} resend_key={'set' if RESEND_API_KEY else 'missing'}")
+    return provider
+
+# app/core/email_utils.py
+def send_email(to_email: str, subject: str, html: str, attachments: list[str] | None = None):
+    provider = current_provider()
 
     if provider == "smtp":
         return _send_via_smtp(to_email, subject, html, attachments)
     if provider == "resend":
         return _send_via_resend(to_email, subject, html, attachments)
     raise RuntimeError("No email provider configured")
+
+
+# ---------- Async backend (pooled SMTP on the mail executor + shared httpx.AsyncClient)
+_async_http = None  # httpx.AsyncClient, opened in main.py lifespan
+
+
+async def open_async_clients():
+    """Create the long-lived Resend HTTP client. Safe to call more than once."""
+    global _async_http
+    if _async_http is None or _async_http.is_closed:
+        import httpx
+        _async_http = httpx.AsyncClient(
+            timeout=30,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _async_http
+
+
+async def close_async_clients():
+    global _async_http
+    client, _async_http = _async_http, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+async def _async_send_via_resend(to_email: str, subject: str, html: str, attachments: Optional[Iterable[str]] = None):
+    if not RESEND_API_KEY:
+        raise RuntimeError("RESEND_API_KEY not set")
+
+    client = await open_async_clients()
+    payload = _resend_payload(to_email, subject, html, attachments)
+    headers = {"Authorization": f"Bearer {RESEND_API_KEY}"}
+    r = await client.post(RESEND_URL, json=payload, headers=headers)
+    r.raise_for_status()
+
+async def async_send_email(to_email: str, subject: str, html: str, attachments: list[str] | None = None,
+                           provider: str | None = None):
+    """Async twin of send_email: same provider selection, no blocking I/O on the event loop."""
+    provider = provider or current_provider()
+
+    if provider == "smtp":
+        # Through SMTPPool on the bounded mail executor: sessions stay authenticated
+        # across messages instead of a new connect + STARTTLS + LOGIN each time.
+        return await offload.run_mail(_send_via_smtp, to_email, subject, html, attachments)
+    if provider == "resend":
+        return await _async_send_via_resend(to_email, subject, html, attachments)
+    raise RuntimeError("No email provider configured")
+
+async def async_send_resend_batch(messages: list[dict]):
+    """
+    Send up to RESEND_BATCH_MAX attachment-free messages in one Resend call.
+    Each message is a dict with to_email, subject and html.
+    """
+    if not RESEND_API_KEY:
+        raise RuntimeError("RESEND_API_KEY not set")
+    if len(messages) > RESEND_BATCH_MAX:
+        raise ValueError(f"Resend batch is limited to {RESEND_BATCH_MAX} messages")
+
+    client = await open_async_clients()
+    payload = [_resend_payload(m["to_email"], m["subject"], m["html"]) for m in messages]
+    headers = {"Authorization": f"Bearer {RESEND_API_KEY}"}
+    r = await client.post(RESEND_BATCH_URL, json=payload, headers=headers)
+    r.raise_for_status()
@@ -0,0 +1,276 @@
+# app/core/export.py
+"""
+CSV / XLSX exports of clients (User), invoices and service lines.
+
+Rows are read in keyset chunks of EXPORT_CHUNK and written as they arrive, so memory
+holds one chunk however large the table is. CSV is streamed to the client chunk by
+chunk; XLSX goes through openpyxl's write-only workbook (rows spill to a temp file)
+and is sent once the file is complete.
+
+    export_where("services", client_id=..., date_from=...)   # filters → Prisma where; ValueError on bad role
+    resolve_columns("invoices", "id,invoiceDate,total")      # ValueError on unknown names
+    csv_chunks(entity, columns, where)                       # async iterator of bytes
+    await xlsx_file(entity, columns, where)                  # path of a finished .xlsx; ExportTooLarge past the sheet limit
+"""
+from __future__ import annotations
+
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Optional
+
+from app.core import offload
+from app.core.pagination import paginate
+from app.db import prisma
+
+EXPORT_CHUNK = int(os.getenv("EXPORT_CHUNK", "1000"))
+XLSX_MAX_ROWS = 1_048_575   # sheet limit minus the header row
+ROLES = ("ADMIN", "CLIENT", "POTENTIAL", "GUEST", "OTHER")   # enum Role in schema.prisma
+
+
+class ExportTooLarge(ValueError):
+    """More rows match than one XLSX sheet holds."""
+
+
+def _attr(*path: str) -> Callable[[Any], Any]:
+    def read(row):
+        for name in path:
+            row = getattr(row, name, None) if row is not None else None
+        return row
+    return read
+
+
+def _full_name(person) -> str:
+    return f"{person.name} {person.surname}".strip() if person is not None else ""
+
+
+# entity → column → (getter, relation it needs loaded)
+_CLIENT = {"client": True}
+_INVOICE = {"invoice": True}
+_INVOICE_CLIENT = {"invoice": {"include": {"client": True}}}
+
+COLUMNS: dict[str, dict[str, tuple[Callable[[Any], Any], Optional[dict]]]] = {
+    "clients": {
+        name: (_attr(name), None) for name in (
+            "id", "name", "surname", "email", "phone", "address", "role", "clientType",
+            "status", "tasks", "dateOfBirth", "placeOfBirth", "sex", "description",
+            "createdAt", "updatedAt",
+        )
+    },
+    "invoices": {
+        **{name: (_attr(name), None) for name in (
+            "id", "clientId", "invoiceType", "invoiceDate", "dueDate", "total", "sent",
+            "accountName", "sortCode", "accountNumber", "iban", "pdfPath", "createdAt", "updatedAt",
+        )},
+        "clientName": (lambda inv: _full_name(inv.client), _CLIENT),
+        "clientEmail": (_attr("client", "email"), _CLIENT),
+    },
+    "services": {
+        **{name: (_attr(name), None) for name in ("id", "invoiceId", "description", "price")},
+        "invoiceDate": (_attr("invoice", "invoiceDate"), _INVOICE),
+        "invoiceSent": (_attr("invoice", "sent"), _INVOICE),
+        "clientId": (_attr("invoice", "clientId"), _INVOICE),
+        "clientName": (lambda s: _full_name(s.invoice.client), _INVOICE_CLIENT),
+        "clientEmail": (_attr("invoice", "client", "email"), _INVOICE_CLIENT),
+    },
+}
+
+DEFAULT_COLUMNS = {
+    "clients": ["id", "name", "surname", "email", "phone", "clientType", "status", "tasks", "createdAt"],
+    "invoices": ["id", "invoiceDate", "dueDate", "clientName", "clientEmail", "invoiceType", "total", "sent"],
+    "services": ["id", "invoiceId", "invoiceDate", "clientName", "description", "price"],
+}
+
+_MODELS = {"clients": "user", "invoices": "invoice", "services": "service"}
+
+
+def resolve_columns(entity: str, raw: Optional[str]) -> list[str]:
+    """Comma-separated column names → validated list (defaults when empty)."""
+    if entity not in COLUMNS:
+        raise ValueError(f"Unknown export '{entity}'; choose from {', '.join(COLUMNS)}")
+    names = [c.strip() for c in (raw or "").split(",") if c.strip()]
+    if not names:
+        return list(DEFAULT_COLUMNS[entity])
+    unknown = [c for c in names if c not in COLUMNS[entity]]
+    if unknown:
+        raise ValueError(f"Unknown column(s) {', '.join(unknown)}; available: {', '.join(COLUMNS[entity])}")
+    return list(dict.fromkeys(names))
+
+
+def _day(value: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def export_where(
+    entity: str,
+    *,
+    status: Optional[str] = None,
+    client_type: Optional[str] = None,
+    role: Optional[str] = None,
+    sent: Optional[str] = None,
+    client_id: Optional[str] = None,
+    invoice_id: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+) -> dict:
+    """
+    Query filters → Prisma where. Dates are inclusive days and apply to createdAt for
+    clients and to the invoice date for invoices and service lines. ValueError on a
+    role that isn't a Role.
+    """
+    span: dict = {}
+    if _day(date_from):
+        span["gte"] = _day(date_from)
+    if _day(date_to):
+        span["lt"] = _day(date_to) + timedelta(days=1)
+
+    if entity == "clients":
+        where: dict = {}
+        if status:
+            where["status"] = status
+        if client_type:
+            where["clientType"] = client_type
+        if role:
+            if role.upper() not in ROLES:
+                raise ValueError(f"Unknown role '{role}'; choose from {', '.join(ROLES)}")
+            where["role"] = role.upper()
+        if span:
+            where["createdAt"] = span
+        return where
+
+    invoice: dict = {}
+    if sent in ("1", "0"):
+        invoice["sent"] = sent == "1"
+    if client_id:
+        invoice["clientId"] = client_id
+    if span:
+        invoice["invoiceDate"] = span
+    if entity == "invoices":
+        if invoice_id:
+            invoice["id"] = invoice_id
+        return invoice
+
+    where = {"invoiceId": invoice_id} if invoice_id else {}
+    if invoice:
+        where["invoice"] = {"is": invoice}
+    return where
+
+
+def _include(entity: str, columns: list[str]) -> Optional[dict]:
+    include: dict = {}
+    for name in columns:
+        rel = COLUMNS[entity][name][1]
+        if rel:
+            for key, val in rel.items():
+                if include.get(key) in (None, True):
+                    include[key] = val
+    return include or None
+
+
+async def _chunks(entity: str, where: dict, include: Optional[dict]) -> AsyncIterator[list]:
+    model = getattr(prisma, _MODELS[entity])
+    if entity == "services":
+        # Service has no createdAt; walk the primary key instead.
+        last = None
+        while True:
+            conditions = [c for c in (where, {"id": {"gt": last}} if last else None) if c]
+            rows = await model.find_many(
+                where={"AND": conditions} if conditions else None,
+                order={"id": "asc"},
+                take=EXPORT_CHUNK,
+                include=include,
+            )
+            if rows:
+                yield rows
+            if len(rows) < EXPORT_CHUNK:
+                return
+            last = rows[-1].id
+    else:
+        cursor = None
+        while True:
+            rows, cursor = await paginate(
+                model, where=where, sort="createdAt", direction="asc",
+                cursor=cursor, limit=EXPORT_CHUNK, include=include,
+            )
+            if rows:
+                yield rows
+            if not cursor:
+                return
+
+
+def _plain(value: Any) -> Any:
+    value = getattr(value, "value", value)          # Prisma enums (Role)
+    if isinstance(value, (list, tuple)):
+        return "; ".join(str(v) for v in value)
+    return value
+
+
+def _csv_cell(value: Any) -> Any:
+    value = _plain(value)
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _xlsx_cell(value: Any) -> Any:
+    value = _plain(value)
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        # Excel has no time zones; openpyxl rejects aware datetimes.
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+async def csv_chunks(entity: str, columns: list[str], where: dict) -> AsyncIterator[bytes]:
+    getters = [COLUMNS[entity][c][0] for c in columns]
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    buf.write("\ufeff")   # BOM so Excel opens the file as UTF-8
+    writer.writerow(columns)
+    async for rows in _chunks(entity, where, _include(entity, columns)):
+        for row in rows:
+            writer.writerow([_csv_cell(get(row)) for get in getters])
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")   # header only: nothing matched
+
+
+async def xlsx_file(entity: str, columns: list[str], where: dict) -> str:
+    """Write the export to a temporary .xlsx and return its path (caller deletes it)."""
+    try:
+        from openpyxl import Workbook
+    except Exception as e:
+        raise RuntimeError("openpyxl is not installed. Run: pip install openpyxl") from e
+
+    too_large = ExportTooLarge(f"More than {XLSX_MAX_ROWS} rows match; use CSV for this export")
+    if await getattr(prisma, _MODELS[entity]).count(where=where or None) > XLSX_MAX_ROWS:
+        raise too_large
+
+    getters = [COLUMNS[entity][c][0] for c in columns]
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(entity)
+    ws.append(columns)
+    written = 0
+    async for rows in _chunks(entity, where, _include(entity, columns)):
+        if written + len(rows) > XLSX_MAX_ROWS:
+            raise too_large   # rows were added since the count
+        for row in rows:
+            ws.append([_xlsx_cell(get(row)) for get in getters])
+        written += len(rows)
+
+    fd, path = tempfile.mkstemp(prefix=f"export_{entity}_", suffix=".xlsx")
+    os.close(fd)
+    try:
+        await offload.run_render(wb.save, path)
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
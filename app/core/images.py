@@ -0,0 +1,153 @@
+# app/core/images.py
+"""
+Responsive variants for the public images (app/static/public, app/static/logos).
+
+Build step (needs Pillow; AVIF when Pillow has it built in or pillow-avif-plugin is installed):
+
+    python -m app.core.images
+
+writes resized WebP/AVIF files with content-hashed names into app/static/img/ plus a
+manifest.json. Templates call responsive_img(...), which emits a <picture> with
+srcset/sizes and lazy loading, or a plain lazy <img> when no variants were built.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from markupsafe import Markup, escape
+
+from app.core.assets import asset_url
+
+BASE_DIR = Path(__file__).resolve().parents[2]        # project root
+STATIC_DIR = BASE_DIR / "app" / "static"
+SOURCE_DIRS = ("public", "logos")
+OUTPUT_DIR = STATIC_DIR / "img"
+MANIFEST_PATH = OUTPUT_DIR / "manifest.json"
+
+WIDTHS = tuple(int(w) for w in os.getenv("IMAGE_WIDTHS", "96,160,320,640,960,1280,1920").split(","))
+QUALITY = {"avif": 50, "webp": 78}
+SOURCE_EXTS = {".jpg", ".jpeg", ".png", ".avif", ".webp"}
+
+
+# ---------- Template helper
+@lru_cache(maxsize=1)
+def _manifest() -> dict:
+    try:
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _srcset(variants: list) -> str:
+    return ", ".join(f"{url} {w}w" for w, url in variants)
+
+
+def responsive_img(src: str, alt: str = "", sizes: str = "100vw", cls: str | None = None,
+                   lazy: bool = True) -> Markup:
+    """<picture> with AVIF/WebP srcsets for `src` (a /static/... path)."""
+    entry = _manifest().get(src)
+    attrs = [f'src="{escape(asset_url(src))}"', f'alt="{escape(alt)}"']
+    if cls:
+        attrs.append(f'class="{escape(cls)}"')
+    if entry:
+        attrs.append(f'width="{entry["width"]}" height="{entry["height"]}"')
+    if lazy:
+        attrs.append('loading="lazy" decoding="async"')
+    img = f"<img {' '.join(attrs)}>"
+    if not entry:
+        return Markup(img)
+    sources = "".join(
+        f'<source type="image/{fmt}" srcset="{_srcset(variants)}" sizes="{escape(sizes)}">'
+        for fmt, variants in entry["variants"].items() if variants
+    )
+    return Markup(f"<picture>{sources}{img}</picture>")
+
+
+# ---------- Build step
+def _formats() -> list[str]:
+    from PIL import Image
+    try:
+        import pillow_avif  # noqa: F401  (registers the AVIF plugin on older Pillow)
+    except ImportError:
+        pass
+    Image.init()
+    # AVIF first: browsers take the first <source> they support.
+    return (["avif"] if "AVIF" in Image.SAVE else []) + ["webp"]
+
+
+def _sources():
+    for sub in SOURCE_DIRS:
+        for path in sorted((STATIC_DIR / sub).iterdir()):
+            if path.suffix.lower() in SOURCE_EXTS:
+                yield path
+
+
+def _variant_widths(width: int) -> list[int]:
+    return sorted({w for w in WIDTHS if w < width} | {width})
+
+
+def build(force: bool = False) -> dict:
+    """Generate variants for every source image; unchanged sources are skipped."""
+    from PIL import Image, ImageOps
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    old = {} if force else _manifest()
+    formats = _formats()
+    manifest: dict = {}
+    for path in _sources():
+        src = "/static/" + path.relative_to(STATIC_DIR).as_posix()
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+        prev = old.get(src)
+        if prev and prev.get("source") == digest and prev.get("formats") == formats and all(
+            (STATIC_DIR / url.removeprefix("/static/")).exists()
+            for variants in prev["variants"].values() for _, url in variants
+        ):
+            manifest[src] = prev
+            continue
+        try:
+            with Image.open(path) as im:
+                im = ImageOps.exif_transpose(im)
+                im.load()
+        except Exception as e:
+            print(f"[images] skip {src}: {e}")
+            continue
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "transparency" in im.info or im.mode in ("LA", "P") else "RGB")
+        entry = {"source": digest, "width": im.width, "height": im.height, "formats": formats,
+                 "variants": {fmt: [] for fmt in formats}}
+        for w in _variant_widths(im.width):
+            resized = im if w == im.width else im.resize((w, round(im.height * w / im.width)), Image.LANCZOS)
+            for fmt in formats:
+                buf = io.BytesIO()
+                resized.save(buf, fmt.upper(), quality=QUALITY[fmt])
+                data = buf.getvalue()
+                name = f"{path.stem}-{w}.{hashlib.sha256(data).hexdigest()[:10]}.{fmt}"
+                (OUTPUT_DIR / name).write_bytes(data)
+                entry["variants"][fmt].append([w, f"/static/img/{name}"])
+        manifest[src] = entry
+
+    # Drop variants that no manifest entry points at any more.
+    live = {url.rsplit("/", 1)[-1] for e in manifest.values() for v in e["variants"].values() for _, url in v}
+    for f in OUTPUT_DIR.iterdir():
+        if f.name != MANIFEST_PATH.name and f.name not in live:
+            f.unlink()
+
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+    _manifest.cache_clear()
+    return manifest
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    result = build(force="--force" in sys.argv)
+    before = sum((STATIC_DIR / src.removeprefix("/static/")).stat().st_size for src in result)
+    print(f"Built variants for {len(result)} images into {OUTPUT_DIR} "
+          f"({before / 1024:.0f} KB of originals) in {time.perf_counter() - started:.2f}s")
+    sys.exit(0)
@@ -0,0 +1,277 @@
+# app/core/mail_queue.py
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from app.db import prisma
+from app.core import revenue_summary
+from app.internal.load_data import invalidate_invoice
+from app.core.email_utils import (
+    RESEND_BATCH_MAX,
+    async_send_email,
+    async_send_resend_batch,
+    current_provider,
+)
+
+# Row statuses for OutboundEmail
+PENDING, SENDING, SENT, FAILED = "PENDING", "SENDING", "SENT", "FAILED"
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+MAX_ATTEMPTS = int(_env_float("MAIL_QUEUE_MAX_ATTEMPTS", 5))
+BATCH_SIZE = int(_env_float("MAIL_QUEUE_BATCH_SIZE", 50))
+CONCURRENCY = max(1, int(_env_float("MAIL_QUEUE_CONCURRENCY", 4)))
+POLL_SECONDS = _env_float("MAIL_QUEUE_POLL_SECONDS", 5)
+BACKOFF_BASE = _env_float("MAIL_QUEUE_BACKOFF_SECONDS", 30)
+BACKOFF_MAX = _env_float("MAIL_QUEUE_BACKOFF_MAX_SECONDS", 3600)
+REQUEUE_EVERY = _env_float("MAIL_QUEUE_REQUEUE_SECONDS", 300)
+# Provider calls per second (Resend's default API limit is 2 req/s).
+RATES = {
+    "smtp": _env_float("MAIL_RATE_SMTP", 5),
+    "resend": _env_float("MAIL_RATE_RESEND", 2),
+}
+
+
+class _RateLimiter:
+    """Async token bucket: at most `rate` acquisitions per second, bursting to `rate`."""
+
+    def __init__(self, rate: float):
+        self.rate = max(rate, 0.01)
+        self.capacity = max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+_limiters: dict[str, _RateLimiter] = {}
+_sent_times: deque[float] = deque(maxlen=10_000)
+_counters = {"sent": 0, "failed": 0, "retried": 0, "provider_calls": 0}
+
+
+def _limiter(provider: str) -> _RateLimiter:
+    if provider not in _limiters:
+        _limiters[provider] = _RateLimiter(RATES.get(provider, 1))
+    return _limiters[provider]
+
+
+def build_row(to_email: str, subject: str, html: str, attachments: list[str] | None = None,
+              provider: str | None = None, invoice_id: str | None = None,
+              message_id: str | None = None) -> dict:
+    """
+    Data for an OutboundEmail row; usable with either the async or a sync Prisma client.
+    invoice_id / message_id: the Invoice or Message this delivers, marked sent once it's delivered.
+    """
+    return {
+        "toEmail": to_email,
+        "subject": subject,
+        "html": html,
+        "attachments": [a for a in (attachments or []) if a],
+        "provider": provider or current_provider(),
+        "status": PENDING,
+        "nextAttemptAt": datetime.now(),
+        "invoiceId": invoice_id,
+        "messageId": message_id,
+    }
+
+
+async def enqueue(to_email: str, subject: str, html: str, attachments: list[str] | None = None,
+                  provider: str | None = None, invoice_id: str | None = None,
+                  message_id: str | None = None) -> str:
+    row = await prisma.outboundemail.create(
+        data=build_row(to_email, subject, html, attachments, provider, invoice_id, message_id)
+    )
+    return row.id
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(BACKOFF_MAX, BACKOFF_BASE * (2 ** max(0, attempts - 1))))
+
+
+# One statement claims a whole chunk: SKIP LOCKED keeps concurrent workers off each
+# other's rows, and updatedAt is set by hand (raw SQL bypasses @updatedAt) for requeue_stuck.
+CLAIM_SQL = f"""
+UPDATE "OutboundEmail" SET "status" = '{SENDING}', "updatedAt" = $1::timestamp(3)
+WHERE "id" IN (
+    SELECT "id" FROM "OutboundEmail"
+    WHERE "status" = '{PENDING}' AND "nextAttemptAt" <= $1::timestamp(3)
+    ORDER BY "createdAt"
+    LIMIT $2::int
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING "id"
+"""
+
+
+async def _claim(limit: int) -> list:
+    claimed = await prisma.query_raw(CLAIM_SQL, datetime.now().isoformat(), limit)
+    if not claimed:
+        return []
+    return await prisma.outboundemail.find_many(
+        where={"id": {"in": [r["id"] for r in claimed]}},
+        order={"createdAt": "asc"},
+    )
+
+
+async def _mark_sent(rows: list) -> None:
+    if not rows:
+        return
+    await prisma.outboundemail.update_many(
+        where={"id": {"in": [r.id for r in rows]}},
+        data={"status": SENT, "sentAt": datetime.now(), "lastError": None},
+    )
+    now = time.monotonic()
+    _sent_times.extend(now for _ in rows)
+    _counters["sent"] += len(rows)
+    await _mark_delivered(rows)
+
+
+async def _mark_delivered(rows: list) -> None:
+    """Flag the invoices / messages these rows carried as sent (a FAILED row never gets here)."""
+    for row in rows:
+        try:
+            if row.invoiceId:
+                data = {"sent": True}
+                if row.attachments:
+                    data["pdfPath"] = row.attachments[0]
+                # Guarded on sent=False so a resend doesn't count revenue twice.
+                n = await prisma.invoice.update_many(where={"id": row.invoiceId, "sent": False}, data=data)
+                if n:
+                    inv = await prisma.invoice.find_unique(where={"id": row.invoiceId})
+                    if inv is not None:
+                        await revenue_summary.invoice_sent(inv)
+                    await invalidate_invoice(row.invoiceId)
+            if row.messageId:
+                await prisma.message.update_many(where={"id": row.messageId}, data={"sentAt": datetime.now()})
+        except Exception as e:
+            print(f"[mail-queue] {row.id} delivered but marking it sent failed: {e}")
+
+
+async def _mark_failed(row, error: Exception) -> None:
+    attempts = row.attempts + 1
+    if attempts >= MAX_ATTEMPTS:
+        data = {"status": FAILED, "attempts": attempts, "lastError": str(error)[:1000]}
+        _counters["failed"] += 1
+    else:
+        data = {
+            "status": PENDING,
+            "attempts": attempts,
+            "lastError": str(error)[:1000],
+            "nextAttemptAt": datetime.now() + _backoff(attempts),
+        }
+        _counters["retried"] += 1
+    await prisma.outboundemail.update(where={"id": row.id}, data=data)
+
+
+async def _send_one(row, sem: asyncio.Semaphore) -> None:
+    async with sem:
+        await _limiter(row.provider or "smtp").acquire()
+        _counters["provider_calls"] += 1
+        try:
+            await async_send_email(row.toEmail, row.subject, row.html, list(row.attachments or []),
+                                   provider=row.provider)
+        except Exception as e:
+            print(f"[mail-queue] {row.id} to {row.toEmail} failed: {e}")
+            await _mark_failed(row, e)
+        else:
+            await _mark_sent([row])
+
+
+async def _send_resend_batch(rows: list, sem: asyncio.Semaphore) -> None:
+    async with sem:
+        await _limiter("resend").acquire()
+        _counters["provider_calls"] += 1
+        try:
+            await async_send_resend_batch(
+                [{"to_email": r.toEmail, "subject": r.subject, "html": r.html} for r in rows]
+            )
+        except Exception as e:
+            print(f"[mail-queue] resend batch of {len(rows)} failed: {e}")
+            for r in rows:
+                await _mark_failed(r, e)
+        else:
+            await _mark_sent(rows)
+
+
+async def drain_once(limit: int | None = None) -> int:
+    """Claim and deliver one chunk of due messages. Returns how many were claimed."""
+    rows = await _claim(limit or BATCH_SIZE)
+    if not rows:
+        return 0
+
+    sem = asyncio.Semaphore(CONCURRENCY)
+    batchable = [r for r in rows if r.provider == "resend" and not r.attachments]
+    singles = [r for r in rows if not (r.provider == "resend" and not r.attachments)]
+
+    tasks = [_send_one(r, sem) for r in singles]
+    for i in range(0, len(batchable), RESEND_BATCH_MAX):
+        chunk = batchable[i:i + RESEND_BATCH_MAX]
+        tasks.append(_send_resend_batch(chunk, sem) if len(chunk) > 1 else _send_one(chunk[0], sem))
+    await asyncio.gather(*tasks)
+    return len(rows)
+
+
+async def requeue_stuck(older_than: timedelta = timedelta(minutes=15)) -> int:
+    """Return rows left in SENDING by a crashed worker to the queue."""
+    return await prisma.outboundemail.update_many(
+        where={"status": SENDING, "updatedAt": {"lt": datetime.now() - older_than}},
+        data={"status": PENDING},
+    )
+
+
+async def run_worker(stop: asyncio.Event) -> None:
+    """Drain the queue until `stop` is set; sleeps POLL_SECONDS whenever it is empty."""
+    print("📬 Mail queue worker started.")
+    last_requeue = float("-inf")
+    while not stop.is_set():
+        # Rows left in SENDING (a crash, or a failed status write) go back to the queue.
+        if time.monotonic() - last_requeue >= REQUEUE_EVERY:
+            last_requeue = time.monotonic()
+            try:
+                await requeue_stuck()
+            except Exception as e:
+                print(f"[mail-queue] requeue failed: {e}")
+        try:
+            claimed = await drain_once()
+        except Exception as e:
+            print(f"[mail-queue] drain failed: {e}")
+            claimed = 0
+        if not claimed:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+    print("📭 Mail queue worker stopped.")
+
+
+async def metrics() -> dict:
+    """Queue depth by status plus in-process delivery counters and recent throughput."""
+    depth = {}
+    for status in (PENDING, SENDING, FAILED):
+        depth[status.lower()] = await prisma.outboundemail.count(where={"status": status})
+    cutoff = time.monotonic() - 60
+    return {
+        "depth": depth,
+        "sent_last_minute": sum(1 for t in _sent_times if t >= cutoff),
+        **_counters,
+    }
@@ -0,0 +1,60 @@
+# app/core/offload.py
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Blocking work (WeasyPrint renders, SMTP/HTTP mail calls) runs on dedicated, bounded
+# pools so an async handler never stalls the event loop. Sizes come from the env.
+_POOLS = {
+    "render": ("PDF_RENDER_CONCURRENCY", 2),
+    "mail": ("MAIL_CONCURRENCY", 8),
+}
+
+_executors: dict[str, ThreadPoolExecutor] = {}
+_lock = threading.Lock()
+
+
+def _limit(kind: str) -> int:
+    env_name, default = _POOLS[kind]
+    try:
+        value = int(os.getenv(env_name, str(default)))
+    except ValueError:
+        value = default
+    return max(1, value)
+
+
+def _executor(kind: str) -> ThreadPoolExecutor:
+    with _lock:
+        ex = _executors.get(kind)
+        if ex is None:
+            ex = ThreadPoolExecutor(max_workers=_limit(kind), thread_name_prefix=f"offload-{kind}")
+            _executors[kind] = ex
+        return ex
+
+
+async def run_in(kind: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor(kind), functools.partial(fn, *args, **kwargs))
+
+
+async def run_render(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a CPU-heavy PDF render off the event loop (at most PDF_RENDER_CONCURRENCY at once)."""
+    return await run_in("render", fn, *args, **kwargs)
+
+
+async def run_mail(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking mail call off the event loop (at most MAIL_CONCURRENCY at once)."""
+    return await run_in("mail", fn, *args, **kwargs)
+
+
+def shutdown(wait: bool = False) -> None:
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for ex in executors:
+        ex.shutdown(wait=wait, cancel_futures=not wait)
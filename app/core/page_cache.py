@@ -0,0 +1,99 @@
+# app/core/page_cache.py
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import Request
+from fastapi.responses import HTMLResponse, Response
+
+from app.core.templating import env
+
+# Public marketing pages: (template, extra context). Only current_year varies between
+# requests, so each page is rendered once per process (and per year) and served from memory.
+PUBLIC_PAGES: list[tuple[str, dict]] = [
+    ("pages/home.html", {}),
+    ("pages/about.html", {}),
+    ("pages/services.html", {}),
+    ("pages/pricing.html", {}),
+    ("pages/contact.html", {"submitted": False}),
+]
+
+CACHE_CONTROL = os.getenv(
+    "PAGE_CACHE_CONTROL",
+    "public, max-age=300, stale-while-revalidate=86400",
+)
+
+
+class _Page:
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class PageCache:
+    def __init__(self):
+        self._pages: dict[tuple, _Page] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(template_name: str, ctx: dict, year: int) -> tuple:
+        return template_name, year, tuple(sorted((k, repr(v)) for k, v in ctx.items()))
+
+    def get(self, template_name: str, ctx: Optional[dict] = None) -> _Page:
+        ctx = ctx or {}
+        year = datetime.now().year
+        key = self._key(template_name, ctx, year)
+        page = self._pages.get(key)
+        if page is not None:
+            self.hits += 1
+            return page
+        html = env.get_template(template_name).render(**{**ctx, "current_year": year})
+        page = _Page(html.encode("utf-8"))
+        with self._lock:
+            self.misses += 1
+            # Drop last year's copies when the year rolls over.
+            for stale in [k for k in self._pages if k[1] != year]:
+                del self._pages[stale]
+            self._pages[key] = page
+        return page
+
+    def response(self, request: Request, template_name: str, ctx: Optional[dict] = None) -> Response:
+        """Serve a cached page with a strong ETag, answering If-None-Match with 304."""
+        page = self.get(template_name, ctx)
+        headers = {"ETag": page.etag, "Cache-Control": CACHE_CONTROL}
+        if _etag_matches(request.headers.get("if-none-match"), page.etag):
+            return Response(status_code=304, headers=headers)
+        return HTMLResponse(page.body, headers=headers)
+
+    def warm(self, pages: list[tuple[str, dict]] = PUBLIC_PAGES) -> int:
+        for template_name, ctx in pages:
+            self.get(template_name, ctx)
+        return len(pages)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {"pages": len(self._pages), "hits": self.hits, "misses": self.misses}
+
+
+pages = PageCache()
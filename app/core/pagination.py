@@ -0,0 +1,105 @@
+# app/core/pagination.py
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+def page_size(raw: Optional[int], default: int = DEFAULT_PAGE_SIZE) -> int:
+    try:
+        n = int(raw) if raw is not None else default
+    except (TypeError, ValueError):
+        n = default
+    return max(1, min(MAX_PAGE_SIZE, n))
+
+
+def sort_direction(raw: Optional[str]) -> str:
+    return "asc" if (raw or "").lower() == "asc" else "desc"
+
+
+def encode_cursor(value: Any, row_id: str, sort: str = "createdAt", direction: str = "desc") -> str:
+    """Opaque keyset cursor for (sort value, id), tagged with the sort it was issued for."""
+    if isinstance(value, datetime):
+        payload = {"t": "dt", "v": value.isoformat(), "id": row_id}
+    else:
+        payload = {"t": "raw", "v": value, "id": row_id}
+    payload.update(s=sort, d=direction)
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(
+    cursor: Optional[str], sort: str = "createdAt", direction: str = "desc",
+) -> Optional[tuple[Any, str]]:
+    """(value, id) when the cursor is well formed and was issued for this sort/direction."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload.get("s") != sort or payload.get("d") != direction:
+            return None  # issued for another ordering (or edited in the URL)
+        value = payload["v"]
+        if payload.get("t") == "dt":
+            value = datetime.fromisoformat(value)
+        elif isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            return None
+        return value, str(payload["id"])
+    except Exception:
+        return None  # bad/stale cursor → first page
+
+
+def _after(field: str, direction: str, value: Any, row_id: str) -> dict:
+    op = "lt" if direction == "desc" else "gt"
+    return {"OR": [
+        {field: {op: value}},
+        {field: value, "id": {op: row_id}},
+    ]}
+
+
+async def paginate(
+    model,
+    *,
+    where: Optional[dict] = None,
+    sort: str = "createdAt",
+    direction: str = "desc",
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    include: Optional[dict] = None,
+) -> tuple[list, Optional[str]]:
+    """
+    Keyset pagination over (sort, id) for a Prisma model delegate.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    conditions = [where] if where else []
+    decoded = decode_cursor(cursor, sort, direction)
+    if decoded is not None:
+        conditions.append(_after(sort, direction, *decoded))
+
+    kwargs: dict = {
+        "where": {"AND": conditions} if conditions else None,
+        "order": [{sort: direction}, {"id": direction}],
+        "take": limit + 1,
+    }
+    if include:
+        kwargs["include"] = include
+    try:
+        rows = await model.find_many(**kwargs)
+    except Exception:
+        if decoded is None:
+            raise
+        # The value doesn't fit the sort column (a hand-edited cursor): first page.
+        kwargs["where"] = where or None
+        rows = await model.find_many(**kwargs)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort), last.id, sort, direction)
+    return rows, next_cursor
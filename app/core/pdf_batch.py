@@ -0,0 +1,164 @@
+# app/core/pdf_batch.py
+from __future__ import annotations
+
+import os
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+from app.core import pdf_cache
+from app.core.pdf_utils2 import html_to_pdf, pdf_engine, render_invoice_html
+
+DEFAULT_OUT_DIR = "app/static/invoices"
+IN_FLIGHT_PER_WORKER = 2
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one invoice in a batch run."""
+    key: str
+    pdf_path: str | None
+    seconds: float
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _default_workers() -> int:
+    try:
+        configured = int(os.getenv("PDF_BATCH_WORKERS", "0"))
+    except ValueError:
+        configured = 0
+    if configured > 0:
+        return configured
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def _ctx_key(ctx: dict, index: int) -> str:
+    invoice = ctx.get("invoice")
+    inv_id = getattr(invoice, "id", None) if invoice is not None else None
+    return str(ctx.get("key") or inv_id or index)
+
+
+def _payload(ctx: dict, engine: str):
+    if engine == "reportlab":
+        from app.core.pdf_reportlab import invoice_document
+        return invoice_document(ctx)
+    return render_invoice_html(ctx)
+
+
+def _discard(tmp_path: str) -> None:
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+
+
+def _render_one(key: str, engine: str, payload, out_path: str) -> tuple[str, str, float]:
+    """Worker entry point: HTML → PDF (WeasyPrint) or document → PDF (ReportLab) in a child process."""
+    started = time.perf_counter()
+    if engine == "reportlab":
+        from app.core.pdf_reportlab import write_invoice_pdf
+        write_invoice_pdf(payload, out_path)
+    else:
+        html_to_pdf(payload, out_path)
+    return key, out_path, time.perf_counter() - started
+
+
+def iter_render_batch(
+    contexts: Iterable[dict],
+    out_dir: str | None = None,
+    max_workers: int | None = None,
+) -> Iterator[BatchResult]:
+    """
+    Render many invoice contexts (same dicts as invoice_send / run_recurring_invoices)
+    across a bounded process pool and yield a BatchResult as each PDF finishes.
+    A failing invoice is reported, never raised, so the rest of the batch carries on.
+    Contexts whose PDF is already in pdf_cache are yielded straight away without a render.
+    """
+    out_dir = out_dir or os.getenv("PDF_OUTPUT_DIR", DEFAULT_OUT_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Building the HTML / plain document is cheap and needs the ORM objects, so it stays
+    # here; only the render step (payload + path) is shipped to the workers. Each job is
+    # submitted as soon as its payload is built, and at most IN_FLIGHT_PER_WORKER jobs per
+    # worker are outstanding, so payloads never pile up in memory ahead of the pool.
+    engine = pdf_engine()
+    workers = max(1, max_workers or _default_workers())
+    pool: ProcessPoolExecutor | None = None
+    pending: dict = {}   # future → (key, pdf_path, tmp_path, submitted_at)
+
+    def finished(fut) -> BatchResult:
+        key, pdf_path, tmp_path, submitted = pending.pop(fut)
+        try:
+            _, _, seconds = fut.result()
+            return BatchResult(key, pdf_cache.store(tmp_path, pdf_path), seconds)
+        except BrokenProcessPool as e:
+            _discard(tmp_path)
+            return BatchResult(key, None, time.perf_counter() - submitted, f"worker crashed: {e}")
+        except Exception as e:
+            _discard(tmp_path)
+            return BatchResult(key, None, time.perf_counter() - submitted, str(e))
+
+    try:
+        for i, ctx in enumerate(contexts):
+            key = _ctx_key(ctx, i)
+            started = time.perf_counter()
+            try:
+                pdf_path, hit = pdf_cache.lookup(ctx, out_dir)
+                if hit:
+                    yield BatchResult(key, pdf_path, time.perf_counter() - started)
+                    continue
+                payload = _payload(ctx, engine)
+            except Exception as e:
+                yield BatchResult(key, None, time.perf_counter() - started, f"prepare: {e}")
+                continue
+
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=workers)
+            tmp_path = f"{pdf_path}.{uuid.uuid4().hex[:8]}.tmp"
+            try:
+                fut = pool.submit(_render_one, key, engine, payload, tmp_path)
+            except BrokenProcessPool as e:
+                yield BatchResult(key, None, time.perf_counter() - started, f"worker crashed: {e}")
+                continue
+            pending[fut] = (key, pdf_path, tmp_path, time.perf_counter())
+            del payload
+
+            if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield finished(fut)
+
+        for fut in as_completed(list(pending)):
+            yield finished(fut)
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        for _, _, tmp_path, _ in pending.values():   # generator closed early
+            _discard(tmp_path)
+
+
+def render_batch(
+    contexts: Iterable[dict],
+    out_dir: str | None = None,
+    max_workers: int | None = None,
+) -> dict:
+    """Run iter_render_batch to completion and return a summary with per-invoice results."""
+    started = time.perf_counter()
+    results = list(iter_render_batch(contexts, out_dir=out_dir, max_workers=max_workers))
+    failed = [r for r in results if not r.ok]
+    for r in failed:
+        print(f"[pdf-batch] {r.key} failed: {r.error}")
+    return {
+        "total": len(results),
+        "ok": len(results) - len(failed),
+        "failed": len(failed),
+        "seconds": round(time.perf_counter() - started, 3),
+        "results": results,
+    }
@@ -0,0 +1,131 @@
+# app/core/pdf_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any
+
+from app.core.pdf_utils2 import TEMPLATE_VERSION, _service_rows, pdf_engine
+
+DEFAULT_OUT_DIR = "app/static/invoices"
+DEFAULT_MAX_MB = 512
+
+# Only content-addressed files are ever evicted; legacy "{invoice.id}.pdf" files are left alone.
+_DIGEST_FILE = re.compile(r"^[0-9a-f]{64}\.pdf$")
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+
+def _out_dir(out_dir: str | None = None) -> str:
+    return out_dir or os.getenv("PDF_OUTPUT_DIR", DEFAULT_OUT_DIR)
+
+
+def _max_bytes() -> int:
+    try:
+        mb = float(os.getenv("PDF_CACHE_MAX_MB", str(DEFAULT_MAX_MB)))
+    except ValueError:
+        mb = DEFAULT_MAX_MB
+    return int(mb * 1024 * 1024)
+
+
+def _field(obj: Any, name: str) -> str:
+    if obj is None:
+        return ""
+    val = obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+    return "" if val is None else str(val)
+
+
+def context_digest(ctx: dict, engine: str | None = None) -> str:
+    """
+    Stable sha256 over everything that ends up on the rendered invoice:
+    normalized service rows, client fields, company/bank details, dates, notes,
+    logo, the template version and the PDF engine (PDF_ENGINE unless given).
+    """
+    invoice = ctx.get("invoice")
+    client = ctx.get("client")
+    payload = {
+        "v": TEMPLATE_VERSION,
+        "engine": engine or pdf_engine(),
+        "invoice_id": _field(invoice, "id"),
+        "invoice_date": _field(invoice, "invoiceDate"),
+        "rows": _service_rows(ctx.get("services", [])),
+        "total": round(float(ctx.get("total") or 0.0), 2),
+        "client": {k: _field(client, k) for k in ("name", "surname", "email", "phone", "address")},
+        "issue_date": str(ctx.get("issue_date") or ""),
+        "due_date": str(ctx.get("due_date") or ""),
+        "notes": str(ctx.get("notes") or ""),
+        "logo_url": str(ctx.get("logo_url") or ""),
+        "logo_path": str(ctx.get("logo_path") or ""),
+    }
+    for k in (
+        "company_name", "company_email", "company_site", "company_phone",
+        "account_name", "sort_code", "account_number", "iban",
+    ):
+        payload[k] = str(ctx.get(k) or "")
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def lookup(ctx: dict, out_dir: str | None = None, engine: str | None = None) -> tuple[str, bool]:
+    """Return (pdf_path, hit). On a miss the path is where the render should be stored."""
+    out_dir = _out_dir(out_dir)
+    pdf_path = os.path.join(out_dir, f"{context_digest(ctx, engine)}.pdf")
+    hit = os.path.exists(pdf_path)
+    with _lock:
+        _stats["hits" if hit else "misses"] += 1
+    if hit:
+        try:
+            os.utime(pdf_path)  # mark as recently used for eviction
+        except OSError:
+            pass
+    return pdf_path, hit
+
+
+def store(tmp_path: str, pdf_path: str) -> str:
+    """Atomically move a freshly rendered PDF into the cache and enforce the size bound."""
+    os.replace(tmp_path, pdf_path)
+    with _lock:
+        _stats["stores"] += 1
+    evict(os.path.dirname(pdf_path))
+    return pdf_path
+
+
+def evict(out_dir: str | None = None, max_bytes: int | None = None) -> int:
+    """Drop least-recently-used cached PDFs until the directory fits max_bytes."""
+    out_dir = _out_dir(out_dir)
+    limit = _max_bytes() if max_bytes is None else max_bytes
+    entries = []
+    try:
+        with os.scandir(out_dir) as it:
+            for e in it:
+                if e.is_file() and _DIGEST_FILE.match(e.name):
+                    st = e.stat()
+                    entries.append((st.st_mtime, st.st_size, e.path))
+    except FileNotFoundError:
+        return 0
+
+    used = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if used <= limit:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        used -= size
+        removed += 1
+
+    if removed:
+        with _lock:
+            _stats["evictions"] += removed
+    return removed
+
+
+def stats() -> dict:
+    with _lock:
+        return dict(_stats)
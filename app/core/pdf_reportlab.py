@@ -0,0 +1,260 @@
+# app/core/pdf_reportlab.py
+"""
+ReportLab invoice renderer laid out like templates/pdf/invoice_a4.html: centered logo,
+title, invoice-details / bill-to boxes, a From box with bank details, a services
+table that wraps long descriptions and repeats its header across pages, notes and
+the thank-you box. No HTML/CSS engine, so it is much faster per invoice than WeasyPrint.
+
+invoice_document(ctx) flattens a render context into plain, picklable data;
+write_invoice_pdf(doc, path) lays it out. render_invoice_pdf(ctx, path) does both.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any
+from urllib.parse import unquote, urlparse
+from urllib.request import url2pathname
+from xml.sax.saxutils import escape
+
+from app.core.pdf_utils2 import _resolve_logo_for_pdf, _service_rows
+
+INK = "#111827"
+MUTED = "#6b7280"
+LINE = "#e5e7eb"
+THANKS_BG = "#f9fafb"
+LOGO_DPI = 200
+
+_styles = None
+_logos: dict[str, Any] = {}       # path → ImageReader (decoded and scaled once per process)
+_logo_lock = threading.Lock()
+
+
+def _field(obj: Any, name: str) -> str:
+    if obj is None:
+        return ""
+    val = obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+    return "" if val is None else str(val)
+
+
+def _date(invoice: Any, attr: str, fallback: Any) -> str:
+    val = getattr(invoice, attr, None) if invoice is not None else None
+    if hasattr(val, "strftime"):
+        return val.strftime("%d/%m/%Y")
+    return str(fallback or "—")
+
+
+def _logo_path(ctx: dict) -> str | None:
+    url = _resolve_logo_for_pdf(ctx.get("logo_url"))
+    if not url or not url.lower().startswith("file://"):
+        return None
+    return url2pathname(unquote(urlparse(url).path))
+
+
+def invoice_document(ctx: dict) -> dict:
+    """Everything printed on the invoice, as plain strings/floats (safe to send to a worker process)."""
+    invoice = ctx.get("invoice")
+    client = ctx.get("client") or getattr(invoice, "client", None)
+    rows = _service_rows(ctx.get("services") or getattr(invoice, "services", None) or [])
+    total = ctx.get("total")
+    number = ""
+    try:
+        number = f"INV-{invoice.invoiceDate.strftime('%Y%m%d')}-{str(invoice.id)[:6].upper()}" if invoice else ""
+    except Exception:
+        pass
+    doc = {
+        "number": number,
+        "issue_date": _date(invoice, "invoiceDate", ctx.get("issue_date")),
+        "due_date": _date(invoice, "dueDate", ctx.get("due_date")),
+        "total": round(float(total if total is not None else sum(r["price"] for r in rows)), 2),
+        "rows": rows,
+        "client": {k: _field(client, k) for k in ("name", "surname", "email", "phone", "address")},
+        "notes": str(ctx.get("notes") or "").strip(),
+        "logo_path": _logo_path(ctx),
+    }
+    for k in (
+        "company_name", "company_email", "company_site", "company_phone",
+        "account_name", "sort_code", "account_number", "iban",
+    ):
+        doc[k] = str(ctx.get(k) or "")
+    return doc
+
+
+def _para_styles():
+    global _styles
+    if _styles is None:
+        from reportlab.lib.colors import HexColor
+        from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+        from reportlab.lib.styles import ParagraphStyle
+
+        base = ParagraphStyle("base", fontName="Helvetica", fontSize=9, leading=12, textColor=HexColor(INK))
+        _styles = {
+            "base": base,
+            "muted": ParagraphStyle("muted", parent=base, textColor=HexColor(MUTED)),
+            "right": ParagraphStyle("right", parent=base, alignment=TA_RIGHT),
+            "head": ParagraphStyle("head", parent=base, fontName="Helvetica-Bold"),
+            "head_right": ParagraphStyle("head_right", parent=base, fontName="Helvetica-Bold", alignment=TA_RIGHT),
+            "box_title": ParagraphStyle("box_title", parent=base, fontName="Helvetica-Bold", fontSize=10,
+                                        leading=13, spaceAfter=6),
+            "title": ParagraphStyle("title", parent=base, fontName="Helvetica-Bold", fontSize=18, leading=22,
+                                    alignment=TA_CENTER, spaceAfter=4),
+            "subtitle": ParagraphStyle("subtitle", parent=base, textColor=HexColor(MUTED), alignment=TA_CENTER),
+        }
+    return _styles
+
+
+def _logo(path: str | None, height: float):
+    if not path:
+        return None
+    from reportlab.lib.utils import ImageReader
+    from reportlab.platypus import Flowable
+
+    with _logo_lock:
+        reader = _logos.get(path)
+        if reader is None:
+            try:
+                from PIL import Image
+                with Image.open(path) as im:
+                    # Downscale once to print resolution: embedding a full-size logo
+                    # (zlib + encoding) otherwise dominates the per-invoice cost.
+                    px = max(1, round(height / 72 * LOGO_DPI))
+                    if im.height > px:
+                        im = im.resize((max(1, round(im.width * px / im.height)), px), Image.LANCZOS)
+                    im.load()
+                reader = _logos[path] = ImageReader(im)
+            except Exception:
+                return None
+    w, h = reader.getSize()
+
+    class _Logo(Flowable):
+        # platypus.Image re-reads the file; drawing the cached reader skips the decode.
+        def __init__(self):
+            super().__init__()
+            self.width, self.height, self.hAlign = height * w / h, height, "CENTER"
+
+        def draw(self):
+            self.canv.drawImage(reader, 0, 0, self.width, self.height, mask="auto")
+
+    return _Logo()
+
+
+def _text(value: str, fallback: str = "") -> str:
+    return escape(value or fallback).replace("\n", "<br/>")
+
+
+def _box(title: str, lines: list[str], width: float):
+    """Bordered, rounded panel like .meta-box."""
+    from reportlab.lib.colors import HexColor
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, Table, TableStyle
+
+    st = _para_styles()
+    cells = [[Paragraph(escape(title), st["box_title"])]] + [[Paragraph(line, st["muted"])] for line in lines]
+    t = Table(cells, colWidths=[width])
+    t.setStyle(TableStyle([
+        ("BOX", (0, 0), (-1, -1), 0.75, HexColor(LINE)),
+        ("ROUNDEDCORNERS", [4, 4, 4, 4]),
+        ("LEFTPADDING", (0, 0), (-1, -1), 6 * mm),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 6 * mm),
+        ("TOPPADDING", (0, 0), (-1, -1), 0),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 1),
+        ("TOPPADDING", (0, 0), (-1, 0), 6 * mm),
+        ("BOTTOMPADDING", (0, -1), (-1, -1), 6 * mm),
+    ]))
+    return t
+
+
+def write_invoice_pdf(doc: dict, out_path: str) -> None:
+    try:
+        from reportlab.lib.colors import HexColor
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import mm
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+    except Exception as e:
+        raise RuntimeError("ReportLab is not installed. Run: pip install reportlab") from e
+
+    st = _para_styles()
+    margin = 12 * mm
+    width = A4[0] - 2 * margin
+    half = (width - 6 * mm) / 2
+    c = doc["client"]
+    story = []
+
+    logo = _logo(doc.get("logo_path"), 28 * mm)
+    if logo is not None:
+        story += [logo, Spacer(1, 8 * mm)]
+    story.append(Paragraph(f"Invoice {escape(doc['number'])}", st["title"]))
+    story.append(Paragraph(f"{escape(doc['company_name'])} • {escape(doc['company_site'])}", st["subtitle"]))
+    story.append(Spacer(1, 6 * mm))
+
+    details = _box("Invoice details", [
+        f"<b>Issue date:</b> {escape(doc['issue_date'])}",
+        f"<b>Due date:</b> {escape(doc['due_date'])}",
+        f"<b>Total:</b> £{doc['total']:.2f}",
+    ], half)
+    bill_to = _box("Bill To", [
+        escape(f"{c['name']} {c['surname']}".strip()),
+        escape(c["email"]),
+        escape(c["phone"]),
+        _text(c["address"], "—"),
+    ], half)
+    grid = Table([[details, bill_to]], colWidths=[half + 6 * mm, half])
+    grid.setStyle(TableStyle([("VALIGN", (0, 0), (-1, -1), "TOP"), ("LEFTPADDING", (0, 0), (-1, -1), 0),
+                              ("RIGHTPADDING", (0, 0), (-1, -1), 0), ("TOPPADDING", (0, 0), (-1, -1), 0),
+                              ("BOTTOMPADDING", (0, 0), (-1, -1), 0)]))
+    story += [grid, Spacer(1, 8 * mm)]
+
+    story.append(_box("From", [
+        f"<b>{escape(doc['company_name'])}</b>",
+        escape(doc["company_email"]),
+        f"{escape(doc['company_phone'])} • {escape(doc['company_site'])}",
+        f"<b>Account Name:</b> {escape(doc['account_name'])}",
+        f"<b>Sort Code:</b> {escape(doc['sort_code'])}",
+        f"<b>Account Number:</b> {escape(doc['account_number'])}",
+        f"<b>IBAN:</b> {escape(doc['iban'])}",
+    ], width))
+    story.append(Spacer(1, 8 * mm))
+
+    # Services: descriptions wrap; the header row repeats on every page.
+    price_w = 35 * mm
+    data = [[Paragraph("Description", st["head"]), Paragraph("Price (£)", st["head_right"])]]
+    data += [[Paragraph(_text(r["description"]), st["base"]), Paragraph(f"£{r['price']:.2f}", st["right"])]
+             for r in doc["rows"]]
+    data.append([Paragraph("Total:", st["head_right"]), Paragraph(f"£{doc['total']:.2f}", st["head_right"])])
+    table = Table(data, colWidths=[width - price_w, price_w], repeatRows=1)
+    table.setStyle(TableStyle([
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("LEFTPADDING", (0, 0), (-1, -1), 4),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 4),
+        ("TOPPADDING", (0, 0), (-1, -1), 6),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+        ("LINEBELOW", (0, 0), (-1, -2), 0.75, HexColor(LINE)),
+        ("LINEABOVE", (0, -1), (-1, -1), 1.5, HexColor(INK)),
+        ("TOPPADDING", (0, -1), (-1, -1), 8),
+    ]))
+    story.append(table)
+
+    if doc["notes"]:
+        story += [Spacer(1, 10 * mm), Paragraph("<b>Notes</b>", st["base"]),
+                  Paragraph(_text(doc["notes"]), st["muted"])]
+
+    thanks = Table([[Paragraph("<b>Thank you for your business.</b>", st["base"])],
+                    [Paragraph("If you have any questions about this invoice, just reply to this email.", st["base"])]],
+                   colWidths=[width])
+    thanks.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, -1), HexColor(THANKS_BG)),
+        ("BOX", (0, 0), (-1, -1), 0.75, HexColor(LINE)),
+        ("ROUNDEDCORNERS", [4, 4, 4, 4]),
+        ("LEFTPADDING", (0, 0), (-1, -1), 6 * mm),
+        ("TOPPADDING", (0, 0), (-1, 0), 6 * mm),
+        ("BOTTOMPADDING", (0, -1), (-1, -1), 6 * mm),
+    ]))
+    story += [Spacer(1, 8 * mm), thanks]
+
+    SimpleDocTemplate(
+        out_path, pagesize=A4, leftMargin=margin, rightMargin=margin, topMargin=margin, bottomMargin=margin,
+        title=f"Invoice {doc['number']}".strip(), author=doc["company_name"],
+    ).build(story)
+
+
+def render_invoice_pdf(ctx: dict, out_path: str) -> None:
+    write_invoice_pdf(invoice_document(ctx), out_path)
@@ -0,0 +1,176 @@
+# app/core/pdf_stream.py
+"""
+Invoice PDF downloads that don't depend on local disk (Vercel's is ephemeral).
+
+The pdf_cache file for the current render context is served when present (or the stored
+invoice.pdfPath, if it is that same digest). Otherwise the invoice is rendered into memory
+on the render pool and kept in a small in-process LRU, so bytes always match the ETag.
+Either way responses carry a strong ETag derived from the render context, answer
+If-None-Match with 304, and honor single byte-range requests (PDF viewers fetch in ranges).
+"""
+from __future__ import annotations
+
+import io
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Iterator
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from app.core import offload, pdf_cache
+from app.core.pdf_utils2 import render_invoice_pdf
+
+CHUNK = 64 * 1024
+CACHE_CONTROL = "private, no-cache"  # always revalidate; the 304 is cheap
+DEFAULT_LOGO_URL = "/static/logos/dynastra_dark.png"
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_lock = threading.Lock()
+_buffers: OrderedDict[str, bytes] = OrderedDict()   # etag → PDF bytes, LRU order
+_buffered = 0
+
+
+def _max_bytes() -> int:
+    try:
+        return int(float(os.getenv("PDF_STREAM_CACHE_MB", "32")) * 1024 * 1024)
+    except ValueError:
+        return 32 * 1024 * 1024
+
+
+def invoice_etag(ctx: dict) -> str:
+    """
+    Strong validator from pdf_cache's content digest: changes with anything printed on
+    the invoice (client details on User included), the template version or the engine.
+    """
+    return '"' + pdf_cache.context_digest(ctx)[:32] + '"'
+
+
+def invoice_pdf_context(invoice, logo_url: str = DEFAULT_LOGO_URL) -> dict:
+    """Render context for a saved invoice (loaded with client and services)."""
+    return {
+        "invoice": invoice,
+        "client": invoice.client,
+        "services": invoice.services,
+        "total": invoice.total,
+        "issue_date": invoice.invoiceDate.strftime("%Y-%m-%d"),
+        "due_date": invoice.dueDate.strftime("%Y-%m-%d"),
+        "company_name": os.getenv("COMPANY_NAME"),
+        "company_email": os.getenv("COMPANY_EMAIL"),
+        "company_site": os.getenv("COMPANY_SITE"),
+        "company_phone": os.getenv("COMPANY_PHONE"),
+        "account_name": invoice.accountName,
+        "sort_code": invoice.sortCode,
+        "account_number": invoice.accountNumber,
+        "iban": invoice.iban,
+        "logo_url": logo_url,
+        "notes": "",
+    }
+
+
+def _remember(etag: str, body: bytes) -> None:
+    global _buffered
+    with _lock:
+        if etag in _buffers:
+            return
+        _buffers[etag] = body
+        _buffered += len(body)
+        while _buffered > _max_bytes() and len(_buffers) > 1:
+            _, old = _buffers.popitem(last=False)
+            _buffered -= len(old)
+
+
+def _recall(etag: str) -> bytes | None:
+    with _lock:
+        body = _buffers.get(etag)
+        if body is not None:
+            _buffers.move_to_end(etag)
+        return body
+
+
+def render_to_bytes(ctx: dict) -> bytes:
+    buf = io.BytesIO()
+    render_invoice_pdf(ctx, buf)
+    return buf.getvalue()
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    return any(t.strip().removeprefix("W/") in ("*", etag) for t in header.split(","))
+
+
+def _byte_range(request: Request, etag: str, size: int) -> tuple[int, int] | None | bool:
+    """(start, end) for a satisfiable single range; None to send everything; False if unsatisfiable."""
+    header = request.headers.get("range")
+    if not header:
+        return None
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != etag:
+        return None                                  # representation changed → full body
+    m = _RANGE.match(header.strip())
+    if not m or (not m.group(1) and not m.group(2)):
+        return None                                  # multi-range / malformed: full body is allowed
+    if m.group(1):
+        start = int(m.group(1))
+        end = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+    else:
+        start, end = max(0, size - int(m.group(2))), size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _chunks(view: memoryview) -> Iterator[bytes]:
+    for i in range(0, len(view), CHUNK):
+        yield bytes(view[i:i + CHUNK])
+
+
+def stream_bytes(request: Request, body: bytes, etag: str, filename: str) -> Response:
+    headers = {
+        "ETag": etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'inline; filename="{filename}"',
+    }
+    size = len(body)
+    rng = _byte_range(request, etag, size)
+    if rng is False:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    status, view = 200, memoryview(body)
+    if rng:
+        start, end = rng
+        status, view = 206, view[start:end + 1]
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(len(view))
+    return StreamingResponse(_chunks(view), status_code=status, media_type="application/pdf", headers=headers)
+
+
+async def invoice_pdf_response(request: Request, invoice) -> Response:
+    """Download response for a saved invoice (loaded with client and services)."""
+    ctx = invoice_pdf_context(invoice)
+    etag = invoice_etag(ctx)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    filename = f"invoice-{invoice.id}.pdf"
+    path, hit = pdf_cache.lookup(ctx)
+    if not hit:
+        # A stored pdfPath is only current when it is this digest's file (rendered into
+        # another directory); legacy "{id}.pdf" and older digests are re-rendered.
+        stored = invoice.pdfPath
+        current = bool(stored) and os.path.basename(stored) == os.path.basename(path)
+        path = stored if current and os.path.exists(stored) else None
+    if path is not None:
+        # FileResponse does Range/If-Range itself; our ETag replaces its stat-based one.
+        return FileResponse(path, media_type="application/pdf", filename=filename,
+                            content_disposition_type="inline", headers=headers)
+
+    body = _recall(etag)
+    if body is None:
+        body = await offload.run_render(render_to_bytes, ctx)
+        _remember(etag, body)
+    return stream_bytes(request, body, etag, filename)
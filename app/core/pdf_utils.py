@@ -3,7 +3,7 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Any, Iterable, Dict
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from app.core.templating import env
 
 # ---- Paths
 BASE_DIR = Path(__file__).resolve().parents[2]        # project root
@@ -11,11 +11,7 @@ APP_DIR = BASE_DIR / "app"
 TEMPLATES_DIR = APP_DIR / "templates"
 STATIC_DIR = APP_DIR / "static"
 
-# ---- Jinja env
-env = Environment(
-    loader=FileSystemLoader(str(TEMPLATES_DIR)),
-    autoescape=select_autoescape(["html", "xml"])
-)
+# ---- Jinja env: shared app-wide environment (app.core.templating)
 
 def _file_url(p: Path) -> str:
     return p.resolve().as_uri()  # file:///C:/... on Windows
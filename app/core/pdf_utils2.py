@@ -2,21 +2,121 @@
 from __future__ import annotations
 
 import os
+import threading
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Iterable
 
-# --- Try WeasyPrint (preferred)
-try:
-    from weasyprint import HTML  # CSS is optional; we inline @page below
-    HAS_WEASYPRINT = True
-except Exception as _we:
-    HAS_WEASYPRINT = False
-
 # ---- Paths (assumes this file is app/core/pdf_utils.py)
 APP_DIR = Path(__file__).resolve().parents[1]           # .../app
 STATIC_DIR = APP_DIR / "static"                         # .../app/static
 PROJECT_ROOT = APP_DIR.parent                           # project root
 
+# Bump whenever render_invoice_html's markup/CSS changes so cached PDFs are re-rendered.
+TEMPLATE_VERSION = "2"
+
+# Invoice stylesheet: parsed once per render context (see InvoiceRenderer), not per document.
+INVOICE_CSS = """
+@page {
+  size: A4;
+  margin: 12mm;
+}
+body {
+  font-family: Arial, Helvetica, sans-serif;
+  color: #111827;
+  font-size: 12px;
+}
+.header {
+  display:flex; justify-content:space-between; align-items:flex-end;
+  border-bottom:1px solid #e5e7eb; padding-bottom:10px; margin-bottom:12px;
+}
+.brand {
+  display:flex; gap:10px; align-items:center;
+}
+.brand img {
+  height:70px; width:auto; object-fit:contain;
+}
+h1 { margin: 0; font-size: 22px; }
+.muted { color:#6b7280; }
+.meta { text-align:right; }
+.block {
+  display:flex; justify-content:space-between; gap:20mm; margin-top:10px;
+}
+.subtitle { font-weight: 600; margin: 0 0 4px; }
+.strong { font-weight: 700; }
+table {
+  width:100%; border-collapse:collapse; margin-top:14px;
+}
+th, td {
+  border-bottom:1px solid #e5e7eb; padding:6px 4px; text-align:left;
+}
+th:last-child, td:last-child { text-align:right; }
+.tright { text-align:right; }
+.total-row td {
+  border-top:2px solid #111827; border-bottom:none; padding-top:8px;
+  font-weight:700;
+}
+.notes { margin-top: 12px; }
+"""
+
+
+# --- WeasyPrint (preferred) pulls in cairo/pango; import it on the first render, not at startup.
+class InvoiceRenderer:
+    """
+    Long-lived WeasyPrint context (WeasyPrint 60+): INVOICE_CSS parsed once against a pinned
+    FontConfiguration, local assets (the logo) fetched once, and decoded images kept in
+    WeasyPrint's image cache. Per invoice only the variable HTML is parsed and laid out.
+    """
+
+    MAX_ASSETS = 64
+
+    def __init__(self):
+        try:
+            from weasyprint import CSS, HTML, default_url_fetcher
+            from weasyprint.text.fonts import FontConfiguration
+        except Exception as e:
+            raise RuntimeError(
+                "WeasyPrint is not available. Install it (and GTK on Windows) or use simple_invoice_pdf fallback."
+            ) from e
+        self._html = HTML
+        self._default_fetcher = default_url_fetcher
+        self.font_config = FontConfiguration()
+        self.stylesheet = CSS(string=INVOICE_CSS, font_config=self.font_config)
+        self.image_cache: dict = {}
+        self._assets: dict[str, dict] = {}
+
+    def url_fetcher(self, url: str, *args, **kwargs) -> dict:
+        if not url.startswith("file://"):
+            return self._default_fetcher(url, *args, **kwargs)
+        hit = self._assets.get(url)
+        if hit is None:
+            result = self._default_fetcher(url, *args, **kwargs)
+            if "file_obj" in result:
+                with result.pop("file_obj") as f:
+                    result["string"] = f.read()
+            if len(self._assets) < self.MAX_ASSETS:
+                self._assets[url] = result
+            return result
+        return dict(hit)
+
+    def write_pdf(self, html: str, out_path: str) -> None:
+        # base_url helps resolve relative URLs; we’ve already converted /static/... to file://,
+        # but this still helps if other relative refs appear later.
+        doc = self._html(string=html, base_url=STATIC_DIR.as_uri(), url_fetcher=self.url_fetcher)
+        doc.write_pdf(out_path, stylesheets=[self.stylesheet], font_config=self.font_config,
+                      cache=self.image_cache)
+
+
+# One renderer per thread: the render pool is bounded, and WeasyPrint state isn't shared across threads.
+_local = threading.local()
+
+
+def invoice_renderer() -> InvoiceRenderer:
+    renderer = getattr(_local, "renderer", None)
+    if renderer is None:
+        renderer = _local.renderer = InvoiceRenderer()
+    return renderer
+
 
 def _file_url(p: Path) -> str:
     """Convert a filesystem path to a file:// URL (with forward slashes)."""
@@ -81,6 +181,7 @@ def render_invoice_html(ctx: dict) -> str:
       - account_name, sort_code, account_number, iban
       - logo_url (web path); auto-converted to file:// for PDF
       - notes (optional)
+    Styles come from INVOICE_CSS, applied by html_to_pdf.
     """
     invoice = ctx.get("invoice")
     client = ctx.get("client")
@@ -124,48 +225,6 @@ def render_invoice_html(ctx: dict) -> str:
   <head>
     <meta charset="utf-8">
     <title>Invoice {inv_number or ''}</title>
-    <style>
-      @page {{
-        size: A4;
-        margin: 12mm;
-      }}
-      body {{
-        font-family: Arial, Helvetica, sans-serif;
-        color: #111827;
-        font-size: 12px;
-      }}
-      .header {{
-        display:flex; justify-content:space-between; align-items:flex-end;
-        border-bottom:1px solid #e5e7eb; padding-bottom:10px; margin-bottom:12px;
-      }}
-      .brand {{
-        display:flex; gap:10px; align-items:center;
-      }}
-      .brand img {{
-        height:70px; width:auto; object-fit:contain;
-      }}
-      h1 {{ margin: 0; font-size: 22px; }}
-      .muted {{ color:#6b7280; }}
-      .meta {{ text-align:right; }}
-      .block {{
-        display:flex; justify-content:space-between; gap:20mm; margin-top:10px;
-      }}
-      .subtitle {{ font-weight: 600; margin: 0 0 4px; }}
-      .strong {{ font-weight: 700; }}
-      table {{
-        width:100%; border-collapse:collapse; margin-top:14px;
-      }}
-      th, td {{
-        border-bottom:1px solid #e5e7eb; padding:6px 4px; text-align:left;
-      }}
-      th:last-child, td:last-child {{ text-align:right; }}
-      .tright {{ text-align:right; }}
-      .total-row td {{
-        border-top:2px solid #111827; border-bottom:none; padding-top:8px;
-        font-weight:700;
-      }}
-      .notes {{ margin-top: 12px; }}
-    </style>
   </head>
   <body>
     <div class="header">
@@ -222,131 +281,54 @@ def render_invoice_html(ctx: dict) -> str:
 
 def html_to_pdf(html: str, out_path: str) -> None:
     """
-    Convert HTML string to PDF using WeasyPrint. Raises if WeasyPrint isn't available.
+    Convert HTML string to PDF using WeasyPrint with the shared invoice stylesheet.
+    Raises if WeasyPrint isn't available.
     """
-    if not HAS_WEASYPRINT:
-        raise RuntimeError(
-            "WeasyPrint is not available. Install it (and GTK on Windows) or use simple_invoice_pdf fallback."
-        )
-    # base_url helps resolve relative URLs; we’ve already converted /static/... to file://,
-    # but this still helps if other relative refs appear later.
-    HTML(string=html, base_url=STATIC_DIR.as_uri()).write_pdf(out_path)
-
+    invoice_renderer().write_pdf(html, out_path)
 
-# ---------- ReportLab fallback (no-HTML) ----------
-def simple_invoice_pdf(invoice, services, client, ctx: dict, out_path: str) -> None:
-    """
-    Minimal, safe PDF generator using ReportLab. No HTML/CSS required.
-    """
-    try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.units import mm
-    except Exception as e:
-        raise RuntimeError(
-            "ReportLab is not installed. Run: pip install reportlab"
-        ) from e
 
-    c = canvas.Canvas(out_path, pagesize=A4)
-    width, height = A4
+# ---------- Engine selection ----------
+PDF_ENGINES = ("weasyprint", "reportlab", "auto")
 
-    y = height - 20 * mm
 
-    # Header
-    inv_number = ""
+@lru_cache(maxsize=1)
+def _weasyprint_usable() -> bool:
     try:
-        inv_number = f"INV-{invoice.invoiceDate.strftime('%Y%m%d')}-{str(invoice.id)[:6].upper()}" if invoice else ""
+        import weasyprint  # noqa: F401  (fails without GTK/Pango, e.g. bare Windows)
+        return True
     except Exception:
-        pass
+        return False
+
 
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(20 * mm, y, f"INVOICE {inv_number}".strip())
-    y -= 8 * mm
-
-    c.setFont("Helvetica", 10)
-    company_name = ctx.get("company_name", "")
-    company_email = ctx.get("company_email", "")
-    company_phone = ctx.get("company_phone", "")
-    company_site = ctx.get("company_site", "")
-    c.drawString(20 * mm, y, f"{company_name}")
-    y -= 5 * mm
-    c.drawString(20 * mm, y, f"{company_email} • {company_phone} • {company_site}".strip(" • "))
-    y -= 8 * mm
-
-    c.drawString(20 * mm, y, f"Issue: {ctx.get('issue_date','-')}   Due: {ctx.get('due_date','-')}")
-    y -= 6 * mm
-
-    # Bill To
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(20 * mm, y, "Bill To")
-    y -= 6 * mm
-    c.setFont("Helvetica", 10)
-    c.drawString(20 * mm, y, f"{getattr(client,'name','')} {getattr(client,'surname','')}".strip())
-    y -= 5 * mm
-    if getattr(client, "email", None):
-        c.drawString(20 * mm, y, f"{client.email}")
-        y -= 5 * mm
-    if getattr(client, "phone", None):
-        c.drawString(20 * mm, y, f"{client.phone}")
-        y -= 5 * mm
-    addr = getattr(client, "address", "") or ""
-    if addr:
-        c.drawString(20 * mm, y, addr[:100])
-        y -= 8 * mm
-
-    # Services
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(20 * mm, y, "Description")
-    c.drawRightString(190 * mm, y, "Price (£)")
-    y -= 6 * mm
-    c.setFont("Helvetica", 10)
-    total = 0.0
-    for r in _service_rows(services):
-        c.drawString(20 * mm, y, r["description"][:90])
-        c.drawRightString(190 * mm, y, f"£{r['price']:.2f}")
-        total += float(r["price"])
-        y -= 6 * mm
-        if y < 30 * mm:
-            c.showPage()
-            y = height - 20 * mm
-            c.setFont("Helvetica-Bold", 11)
-            c.drawString(20 * mm, y, "Description")
-            c.drawRightString(190 * mm, y, "Price (£)")
-            y -= 6 * mm
-            c.setFont("Helvetica", 10)
-
-    # Total
-    y -= 4 * mm
-    c.setFont("Helvetica-Bold", 11)
-    c.drawRightString(190 * mm, y, f"Total: £{total:.2f}")
-    y -= 10 * mm
-
-    # Bank details
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(20 * mm, y, "Bank details")
-    y -= 6 * mm
-    c.setFont("Helvetica", 10)
-    c.drawString(20 * mm, y, f"Account name: {ctx.get('account_name','')}")
-    y -= 5 * mm
-    c.drawString(20 * mm, y, f"Sort code: {ctx.get('sort_code','')}  •  Account no: {ctx.get('account_number','')}")
-    y -= 5 * mm
-    c.drawString(20 * mm, y, f"IBAN: {ctx.get('iban','-')}")
-
-    # Notes (short)
-    notes = str(ctx.get("notes") or "").strip()
-    if notes:
-        y -= 8 * mm
-        c.setFont("Helvetica-Bold", 11)
-        c.drawString(20 * mm, y, "Notes")
-        y -= 6 * mm
-        c.setFont("Helvetica", 10)
-        for line in notes.splitlines():
-            c.drawString(20 * mm, y, line[:100])
-            y -= 5 * mm
-            if y < 20 * mm:
-                c.showPage()
-                y = height - 20 * mm
-                c.setFont("Helvetica", 10)
-
-    c.showPage()
-    c.save()
+def pdf_engine() -> str:
+    """
+    PDF_ENGINE=weasyprint|reportlab|auto (default auto: WeasyPrint when it can be
+    imported, else ReportLab). ReportLab is far faster per invoice, so bulk runs can
+    pin it explicitly.
+    """
+    engine = os.getenv("PDF_ENGINE", "auto").strip().lower()
+    if engine not in PDF_ENGINES:
+        engine = "auto"
+    if engine == "auto":
+        return "weasyprint" if _weasyprint_usable() else "reportlab"
+    return engine
+
+
+def render_invoice_pdf(ctx: dict, out_path: str, engine: str | None = None) -> str:
+    """Render an invoice context to out_path with the configured engine; returns the engine used."""
+    engine = engine or pdf_engine()
+    if engine == "reportlab":
+        from app.core.pdf_reportlab import render_invoice_pdf as reportlab_invoice_pdf
+        reportlab_invoice_pdf(ctx, out_path)
+    else:
+        html_to_pdf(render_invoice_html(ctx), out_path)
+    return engine
+
+
+# ---------- ReportLab (no-HTML) ----------
+def simple_invoice_pdf(invoice, services, client, ctx: dict, out_path: str) -> None:
+    """
+    ReportLab invoice (app.core.pdf_reportlab); kept for callers of the old fallback.
+    """
+    render_invoice_pdf({**ctx, "invoice": invoice, "services": services, "client": client},
+                       out_path, engine="reportlab")
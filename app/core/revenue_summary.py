@@ -0,0 +1,217 @@
+# app/core/revenue_summary.py
+"""
+Precomputed revenue / receivables figures for the admin dashboard.
+
+RevenueSummary holds running totals in three kinds of row:
+  ("all", "")           everything
+  ("month", "YYYY-MM")  by invoice date
+  ("client", <userId>)  per-client lifetime value and recurring MRR
+
+The write paths bump them with atomic INSERT … ON CONFLICT increments
+(invoice_created, invoice_sent, schedule_created) and clients_deleted takes a deleted
+client's share back out, so the dashboard reads a handful of rows instead of aggregating
+Invoice/Service. "sent" is what has been billed to the client; "outstanding" is
+invoiced but not sent yet. rebuild() recomputes everything from the source tables
+(to repair drift):
+
+    python -m app.core.revenue_summary
+"""
+from __future__ import annotations
+
+import asyncio
+
+from app.db import prisma
+
+# Same statements as the backfill in the RevenueSummary migration.
+REBUILD_SQL = (
+    'DELETE FROM "RevenueSummary"',
+    """
+    INSERT INTO "RevenueSummary" ("kind", "key", "invoiced", "sent", "invoices", "lastInvoiceAt", "updatedAt")
+    SELECT 'all', '', COALESCE(SUM("total"), 0), COALESCE(SUM(CASE WHEN "sent" THEN "total" ELSE 0 END), 0),
+           COUNT(*), MAX("invoiceDate"), CURRENT_TIMESTAMP
+    FROM "Invoice"
+    """,
+    """
+    INSERT INTO "RevenueSummary" ("kind", "key", "invoiced", "sent", "invoices", "lastInvoiceAt", "updatedAt")
+    SELECT 'month', to_char("invoiceDate", 'YYYY-MM'), SUM("total"),
+           SUM(CASE WHEN "sent" THEN "total" ELSE 0 END), COUNT(*), MAX("invoiceDate"), CURRENT_TIMESTAMP
+    FROM "Invoice" GROUP BY 2
+    """,
+    """
+    INSERT INTO "RevenueSummary" ("kind", "key", "invoiced", "sent", "invoices", "lastInvoiceAt", "updatedAt")
+    SELECT 'client', "clientId", SUM("total"),
+           SUM(CASE WHEN "sent" THEN "total" ELSE 0 END), COUNT(*), MAX("invoiceDate"), CURRENT_TIMESTAMP
+    FROM "Invoice" GROUP BY "clientId"
+    """,
+    """
+    UPDATE "RevenueSummary" s SET "mrr" = m."mrr"
+    FROM (
+        SELECT i."clientId",
+               SUM(CASE WHEN lower(r."frequency") = 'annual' THEN i."total" / 12 ELSE i."total" END) AS "mrr"
+        FROM "RecurringInvoice" r JOIN "Invoice" i ON i."id" = r."invoiceId"
+        GROUP BY i."clientId"
+    ) m
+    WHERE s."kind" = 'client' AND s."key" = m."clientId"
+    """,
+    """
+    UPDATE "RevenueSummary"
+    SET "mrr" = (SELECT COALESCE(SUM("mrr"), 0) FROM "RevenueSummary" WHERE "kind" = 'client')
+    WHERE "kind" = 'all'
+    """,
+)
+
+
+def monthly_value(total: float, frequency: str) -> float:
+    """A schedule's contribution to MRR (annual schedules count a twelfth)."""
+    return round(float(total) / 12, 2) if (frequency or "").lower() == "annual" else float(total)
+
+
+def _buckets(inv) -> list[tuple[str, str]]:
+    return [("all", ""), ("month", inv.invoiceDate.strftime("%Y-%m")), ("client", inv.clientId)]
+
+
+# One statement, so concurrent first writes of a key can't both try to INSERT it, and a
+# backdated invoice never moves lastInvoiceAt backwards (GREATEST skips NULLs).
+BUMP_SQL = """
+INSERT INTO "RevenueSummary" ("kind", "key", "invoiced", "sent", "invoices", "mrr", "lastInvoiceAt", "updatedAt")
+VALUES ($1, $2, $3::double precision, $4::double precision, $5::int, $6::double precision,
+        $7::timestamptz AT TIME ZONE 'UTC', CURRENT_TIMESTAMP)
+ON CONFLICT ("kind", "key") DO UPDATE SET
+    "invoiced" = "RevenueSummary"."invoiced" + EXCLUDED."invoiced",
+    "sent" = "RevenueSummary"."sent" + EXCLUDED."sent",
+    "invoices" = "RevenueSummary"."invoices" + EXCLUDED."invoices",
+    "mrr" = "RevenueSummary"."mrr" + EXCLUDED."mrr",
+    "lastInvoiceAt" = GREATEST("RevenueSummary"."lastInvoiceAt", EXCLUDED."lastInvoiceAt"),
+    "updatedAt" = CURRENT_TIMESTAMP
+"""
+
+
+async def _bump(kind: str, key: str, deltas: dict, last=None) -> None:
+    await prisma.execute_raw(
+        BUMP_SQL, kind, key,
+        float(deltas.get("invoiced", 0)), float(deltas.get("sent", 0)),
+        int(deltas.get("invoices", 0)), float(deltas.get("mrr", 0)),
+        last.isoformat() if last is not None else None,
+    )
+
+
+async def _apply(inv, deltas: dict, buckets, last=None) -> None:
+    # Hooks for the mutation routes and scheduler: never raise, rebuild() repairs a miss.
+    try:
+        await asyncio.gather(*(_bump(kind, key, deltas, last) for kind, key in buckets))
+    except Exception as e:
+        print(f"[revenue] update for invoice {inv.id} failed: {e}")
+
+
+async def invoice_created(inv) -> None:
+    deltas = {"invoiced": float(inv.total), "invoices": 1}
+    if inv.sent:
+        deltas["sent"] = float(inv.total)
+    await _apply(inv, deltas, _buckets(inv), last=inv.invoiceDate)
+
+
+async def invoice_sent(inv) -> None:
+    """Call once, when an unsent invoice is marked sent."""
+    await _apply(inv, {"sent": float(inv.total)}, _buckets(inv))
+
+
+async def schedule_created(inv, frequency: str) -> None:
+    """A RecurringInvoice was attached to `inv`."""
+    await _apply(inv, {"mrr": monthly_value(inv.total, frequency)}, [("all", ""), ("client", inv.clientId)])
+
+
+# Subtract deleted clients' invoices and MRR; {ids} is a "$1, $2, …" placeholder list.
+# lastInvoiceAt on month/all rows is left as is (it only feeds "last invoice" displays).
+CLIENTS_DELETED_SQL = (
+    """
+    UPDATE "RevenueSummary" s
+    SET "invoiced" = s."invoiced" - d."invoiced", "sent" = s."sent" - d."sent",
+        "invoices" = s."invoices" - d."invoices", "updatedAt" = CURRENT_TIMESTAMP
+    FROM (
+        SELECT to_char("invoiceDate", 'YYYY-MM') AS "key", SUM("total") AS "invoiced",
+               SUM(CASE WHEN "sent" THEN "total" ELSE 0 END) AS "sent", COUNT(*) AS "invoices"
+        FROM "Invoice" WHERE "clientId" IN ({ids}) GROUP BY 1
+    ) d
+    WHERE s."kind" = 'month' AND s."key" = d."key"
+    """,
+    """
+    UPDATE "RevenueSummary" s
+    SET "invoiced" = s."invoiced" - d."invoiced", "sent" = s."sent" - d."sent",
+        "invoices" = s."invoices" - d."invoices", "mrr" = s."mrr" - d."mrr",
+        "updatedAt" = CURRENT_TIMESTAMP
+    FROM (
+        SELECT COALESCE(SUM("invoiced"), 0) AS "invoiced", COALESCE(SUM("sent"), 0) AS "sent",
+               COALESCE(SUM("invoices"), 0) AS "invoices", COALESCE(SUM("mrr"), 0) AS "mrr"
+        FROM "RevenueSummary" WHERE "kind" = 'client' AND "key" IN ({ids})
+    ) d
+    WHERE s."kind" = 'all' AND s."key" = ''
+    """,
+    'DELETE FROM "RevenueSummary" WHERE "kind" = \'client\' AND "key" IN ({ids})',
+)
+
+
+async def clients_deleted(tx, client_ids: list[str]) -> bool:
+    """
+    Take the clients' invoices and MRR out of the totals, inside the transaction that
+    deletes them and before their invoices go. Runs under a savepoint: on failure the
+    delete still commits and this returns False, so the caller can rebuild() afterwards.
+    """
+    ids = ", ".join(f"${i}" for i in range(1, len(client_ids) + 1))
+    await tx.execute_raw("SAVEPOINT revenue_summary")
+    try:
+        for sql in CLIENTS_DELETED_SQL:
+            await tx.execute_raw(sql.format(ids=ids), *client_ids)
+    except Exception as e:
+        print(f"[revenue] subtracting {len(client_ids)} deleted client(s) failed: {e}")
+        await tx.execute_raw("ROLLBACK TO SAVEPOINT revenue_summary")
+        return False
+    await tx.execute_raw("RELEASE SAVEPOINT revenue_summary")
+    return True
+
+
+async def rebuild() -> None:
+    async with prisma.tx() as tx:
+        for sql in REBUILD_SQL:
+            await tx.execute_raw(sql)
+
+
+def _figures(row) -> dict:
+    invoiced = round(row.invoiced, 2) if row else 0.0
+    sent = round(row.sent, 2) if row else 0.0
+    return {
+        "invoiced": invoiced,
+        "sent": sent,
+        "outstanding": round(invoiced - sent, 2),
+        "invoices": row.invoices if row else 0,
+        "mrr": round(row.mrr, 2) if row else 0.0,
+        "last_invoice_at": row.lastInvoiceAt if row else None,
+    }
+
+
+async def dashboard(months: int = 12, top: int = 10) -> dict:
+    """Totals, the last `months` months and the `top` clients by lifetime value."""
+    total, month_rows, client_rows = await asyncio.gather(
+        prisma.revenuesummary.find_unique(where={"kind_key": {"kind": "all", "key": ""}}),
+        prisma.revenuesummary.find_many(where={"kind": "month"}, order={"key": "desc"}, take=months),
+        prisma.revenuesummary.find_many(where={"kind": "client"}, order={"invoiced": "desc"}, take=top),
+    )
+    users = await prisma.user.find_many(where={"id": {"in": [r.key for r in client_rows]}}) if client_rows else []
+    names = {u.id: f"{u.name} {u.surname}".strip() for u in users}
+    return {
+        "totals": _figures(total),
+        "months": [{"month": r.key, **_figures(r)} for r in reversed(month_rows)],
+        "clients": [{"id": r.key, "name": names.get(r.key, r.key), **_figures(r)} for r in client_rows],
+    }
+
+
+async def _main() -> None:
+    await prisma.connect()
+    try:
+        await rebuild()
+        print(f"✅ Revenue summary rebuilt: {(await dashboard(months=0, top=0))['totals']}")
+    finally:
+        await prisma.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
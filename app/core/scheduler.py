@@ -1,41 +1,102 @@
+import asyncio
 import os
+import time
+import uuid
 from datetime import datetime, timedelta
-from apscheduler.schedulers.background import BackgroundScheduler
+from typing import Awaitable, Callable
+
 try:
-    from app.generated.prisma import Prisma
-except ImportError:
-    from prisma import Prisma
-from app.core.email_utils import send_email
-from app.core.pdf_utils2 import render_invoice_html, html_to_pdf
+    from zoneinfo import ZoneInfo
+    TZ = ZoneInfo("Europe/London")
+except Exception:  # no tzdata (e.g. bare Windows) → server local time
+    TZ = None
+
+from app.db import prisma
+from app.core import offload, pdf_batch, revenue_summary
+from app.core.mail_queue import PENDING, SENDING, build_row
 
-db = Prisma()
-scheduler = BackgroundScheduler(timezone="Europe/London")
+# Jobs run as asyncio tasks on the app's own loop (started/stopped from main.py lifespan)
+# and share its Prisma client; at most SCHEDULER_CONCURRENCY job runs execute at once.
+SCHEDULER_CONCURRENCY = max(1, int(os.getenv("SCHEDULER_CONCURRENCY", "1")))
 
 def _ensure_db():
-    if not db.is_connected():
-        db.connect()
+    if not prisma.is_connected():
+        raise RuntimeError("Database is not connected")
 
 def roll_date(base: datetime, freq: str) -> datetime:
     return base + (timedelta(days=30) if freq.lower()=="monthly" else timedelta(days=365))
 
-def run_recurring_invoices():
-    _ensure_db()
-    today = datetime.now()
-    recurs = db.recurringinvoice.find_many(where={ "nextRun": { "lte": today } }, include={"invoice": { "include": {"client": True, "services": True} }})
-    for r in recurs:
-        src = r.invoice
-        client = src.client
-        services = src.services
-
-        new_issue = today
-        new_due = today + timedelta(days=14)
-        total = round(sum(s.price for s in services), 2)
-
-        new_inv = db.invoice.create(data={
-            "clientId": client.id,
+RECURRING_WORKERS = max(1, int(os.getenv("RECURRING_WORKERS", "4")))
+RECURRING_CHUNK = max(1, int(os.getenv("RECURRING_CHUNK", "25")))
+RECURRING_LEASE_SECONDS = int(os.getenv("RECURRING_LEASE_SECONDS", "600"))
+
+_run_lock = asyncio.Lock()
+last_run_stats: dict = {}
+
+
+def _invoice_context(inv) -> dict:
+    return {
+        "invoice": inv,
+        "client": inv.client,
+        "services": inv.services,
+        "total": inv.total,
+        "issue_date": inv.invoiceDate.strftime("%Y-%m-%d"),
+        "due_date": inv.dueDate.strftime("%Y-%m-%d"),
+        "company_name": os.getenv("COMPANY_NAME"),
+        "company_email": os.getenv("COMPANY_EMAIL"),
+        "company_site": os.getenv("COMPANY_SITE"),
+        "company_phone": os.getenv("COMPANY_PHONE"),
+        "account_name": inv.accountName,
+        "sort_code": inv.sortCode,
+        "account_number": inv.accountNumber,
+        "iban": inv.iban,
+        "logo_path": inv.logoPath,
+        "notes": "",
+    }
+
+
+async def _claim_due(run_id: str, now: datetime) -> list:
+    """
+    Lease up to RECURRING_CHUNK due schedules for this run. The guarded update_many only
+    succeeds while the row is still due and unleased (or its lease expired), so concurrent
+    runs, in this process or another, never pick up the same schedule.
+    """
+    free = [{"leaseUntil": None}, {"leaseUntil": {"lt": now}}]
+    due = await prisma.recurringinvoice.find_many(
+        where={"nextRun": {"lte": now}, "OR": free},
+        order={"nextRun": "asc"},
+        take=RECURRING_CHUNK,
+    )
+    claimed = []
+    for r in due:
+        n = await prisma.recurringinvoice.update_many(
+            where={"id": r.id, "nextRun": {"lte": now}, "OR": free},
+            data={"leaseOwner": run_id, "leaseUntil": now + timedelta(seconds=RECURRING_LEASE_SECONDS)},
+        )
+        if n:
+            claimed.append(r.id)
+    return claimed
+
+
+class _LeaseLost(Exception):
+    pass
+
+
+async def _create_next_invoice(r, today: datetime, run_id: str):
+    """
+    Create the next invoice and record it as the schedule's pendingInvoiceId in one
+    transaction. nextRun and the lease are left alone until the invoice is enqueued
+    (_finish), so a failure in between is resumed by the next pass, never billed twice.
+    """
+    src = r.invoice
+    services = src.services
+    total = round(sum(s.price for s in services), 2)
+    async with prisma.tx() as tx:
+        new_inv = await tx.invoice.create(data={
+            "clientId": src.client.id,
             "invoiceType": src.invoiceType,
-            "invoiceDate": new_issue,
-            "dueDate": new_due,
+            "invoiceDate": today,
+            "dueDate": today + timedelta(days=14),
             "total": total,
             "accountName": src.accountName,
             "sortCode": src.sortCode,
@@ -44,49 +105,226 @@ def run_recurring_invoices():
             "logoPath": src.logoPath,
             "services": {"create": [{"description": s.description, "price": s.price} for s in services]},
         }, include={"client": True, "services": True})
+        n = await tx.recurringinvoice.update_many(
+            where={"id": r.id, "leaseOwner": run_id}, data={"pendingInvoiceId": new_inv.id},
+        )
+        if not n:
+            raise _LeaseLost(r.id)   # rolls the invoice back
+    return new_inv
+
+
+async def _finish(r, inv, run_id: str, email: dict) -> None:
+    """Enqueue the email, roll nextRun and release the lease together, only while we still hold it."""
+    async with prisma.tx() as tx:
+        n = await tx.recurringinvoice.update_many(
+            where={"id": r.id, "leaseOwner": run_id},
+            data={"nextRun": roll_date(inv.invoiceDate, r.frequency), "pendingInvoiceId": None,
+                  "leaseOwner": None, "leaseUntil": None},
+        )
+        if not n:
+            raise _LeaseLost(r.id)
+        await tx.outboundemail.create(data=email)
+
+
+async def _prepare(recurring_id: str, run_id: str):
+    """(schedule, invoice to send) for one leased schedule; None if the lease was lost."""
+    r = await prisma.recurringinvoice.find_unique(
+        where={"id": recurring_id},
+        include={"invoice": {"include": {"client": True, "services": True}}},
+    )
+    if r is None or r.leaseOwner != run_id:
+        return None
+    new_inv = None
+    if r.pendingInvoiceId:
+        # A previous pass created this invoice but didn't get as far as enqueueing it.
+        new_inv = await prisma.invoice.find_unique(
+            where={"id": r.pendingInvoiceId}, include={"client": True, "services": True},
+        )
+    try:
+        if new_inv is None:
+            new_inv = await _create_next_invoice(r, datetime.now(), run_id)
+            await revenue_summary.invoice_created(new_inv)
+    except _LeaseLost:
+        return None
+    return r, new_inv
+
 
-        context = {
-            "invoice": new_inv,
-            "client": new_inv.client,
-            "services": new_inv.services,
-            "total": new_inv.total,
-            "issue_date": new_inv.invoiceDate.strftime("%Y-%m-%d"),
-            "due_date": new_inv.dueDate.strftime("%Y-%m-%d"),
-            "company_name": os.getenv("COMPANY_NAME"),
-            "company_email": os.getenv("COMPANY_EMAIL"),
-            "company_site": os.getenv("COMPANY_SITE"),
-            "company_phone": os.getenv("COMPANY_PHONE"),
-            "account_name": new_inv.accountName,
-            "sort_code": new_inv.sortCode,
-            "account_number": new_inv.accountNumber,
-            "iban": new_inv.iban,
-            "logo_path": new_inv.logoPath,
-            "notes": "",
-        }
-
-        html = render_invoice_html(context)
+async def _enqueue(r, new_inv, pdf_path: str, run_id: str) -> bool:
+    """Queue the invoice email and roll the schedule. False if the lease was lost."""
+    client = r.invoice.client
+    subject = f"Invoice {new_inv.invoiceDate.strftime('%Y%m%d')}-{new_inv.id[:6]} — £{new_inv.total:.2f}"
+    body = f"<p>Hello {client.name}, your recurring invoice is attached. Total: £{new_inv.total:.2f}.</p>"
+    # Delivery happens on the mail queue worker, which marks the invoice sent (and stores
+    # pdfPath) only once the provider accepts it; a FAILED row leaves it unsent.
+    try:
+        await _finish(r, new_inv, run_id,
+                      build_row(client.email, subject, body, [pdf_path], invoice_id=new_inv.id))
+    except _LeaseLost:
+        return False
+    return True
+
+
+async def _bill_chunk(claimed: list[str], run_id: str, sem: asyncio.Semaphore) -> list:
+    """
+    Bill one leased chunk: create the invoices, render all their PDFs in one pdf_batch
+    run (a process pool, off the event loop), then enqueue each. One result per id:
+    True billed, False lease lost, or the exception.
+    """
+    async def prepare(rid: str):
+        async with sem:
+            return await _prepare(rid, run_id)
+
+    prepared = await asyncio.gather(*(prepare(rid) for rid in claimed), return_exceptions=True)
+    ready = [p for p in prepared if isinstance(p, tuple)]
+    rendered = {}
+    if ready:
         out_dir = os.getenv("PDF_OUTPUT_DIR", "/app/static/invoices")
-        pdf_path = os.path.join(out_dir, f"{new_inv.id}.pdf")
-        html_to_pdf(html, pdf_path)
+        batch = await offload.run_render(
+            pdf_batch.render_batch, [_invoice_context(inv) for _, inv in ready], out_dir,
+        )
+        rendered = {res.key: res for res in batch["results"]}
+
+    async def finish(p):
+        if not isinstance(p, tuple):
+            return p if isinstance(p, BaseException) else False
+        r, inv = p
+        res = rendered.get(inv.id)
+        if res is None or not res.ok:
+            raise RuntimeError(f"PDF render failed: {res.error if res else 'no result'}")
+        async with sem:
+            return await _enqueue(r, inv, res.pdf_path, run_id)
+
+    return await asyncio.gather(*(finish(p) for p in prepared), return_exceptions=True)
+
+
+async def run_recurring_invoices() -> dict:
+    """
+    Bill every due RecurringInvoice. Due rows are leased in chunks, up to
+    RECURRING_WORKERS are billed concurrently and each chunk's PDFs render as one
+    pdf_batch run; overlapping runs are skipped.
+    Returns per-run stats.
+    """
+    global last_run_stats
+    if _run_lock.locked():
+        print("[recurring] previous run still in progress; skipping")
+        return {"skipped": True}
+    async with _run_lock:
+        started = time.perf_counter()
+        run_id = uuid.uuid4().hex
+        stats = {"run_id": run_id, "started_at": datetime.now().isoformat(timespec="seconds"),
+                 "due": 0, "processed": 0, "failed": 0, "lease_lost": 0, "seconds": 0.0}
+        sem = asyncio.Semaphore(RECURRING_WORKERS)
+
+        try:
+            _ensure_db()
+            now = datetime.now()
+            stats["due"] = await prisma.recurringinvoice.count(where={"nextRun": {"lte": now}})
+            failed_ids: list[str] = []
+            # Failed rows keep their lease until the run ends, so they aren't re-claimed here.
+            while claimed := await _claim_due(run_id, now):
+                results = await _bill_chunk(claimed, run_id, sem)
+                for rid, res in zip(claimed, results):
+                    if isinstance(res, BaseException):
+                        stats["failed"] += 1
+                        failed_ids.append(rid)
+                        print(f"[recurring] {rid} failed: {res}")
+                    elif res:
+                        stats["processed"] += 1
+                    else:
+                        stats["lease_lost"] += 1
+            if failed_ids:
+                # Release early so the next pass can retry them; a created invoice stays
+                # on pendingInvoiceId and is resumed rather than billed again.
+                await prisma.recurringinvoice.update_many(
+                    where={"id": {"in": failed_ids}, "leaseOwner": run_id},
+                    data={"leaseOwner": None, "leaseUntil": None},
+                )
+        finally:
+            stats["seconds"] = round(time.perf_counter() - started, 3)
+            last_run_stats = stats
+    print(f"[recurring] due={stats['due']} processed={stats['processed']} "
+          f"failed={stats['failed']} in {stats['seconds']}s")
+    return stats
 
-        subject = f"Invoice {new_inv.invoiceDate.strftime('%Y%m%d')}-{new_inv.id[:6]} — £{new_inv.total:.2f}"
-        body = f"<p>Hello {client.name}, your recurring invoice is attached. Total: £{new_inv.total:.2f}.</p>"
-        send_email(client.email, subject, body, [pdf_path])
-        db.invoice.update(where={"id": new_inv.id}, data={"sent": True, "pdfPath": pdf_path})
+# Days between sends for each RepeatRule.frequency.
+CADENCE_DAYS = {"DAILY": 1, "WEEKLY": 7, "MONTHLY": 30}
 
-        db.recurringinvoice.update(where={"id": r.id}, data={"nextRun": roll_date(datetime.now(), r.frequency)})
 
-def run_marketing():
+async def run_marketing():
+    """
+    Queue each repeating message whose cadence has elapsed since its last delivery
+    (Message.sentAt, stamped by the mail queue worker). A message that still has a
+    PENDING/SENDING row isn't queued again.
+    """
     _ensure_db()
-    rules = db.repeatrule.find_many(include={"message": True})
+    rules = await prisma.repeatrule.find_many(include={"message": True})
+    if not rules:
+        return
+    queued = await prisma.outboundemail.find_many(
+        where={"messageId": {"in": [rr.messageId for rr in rules]}, "status": {"in": [PENDING, SENDING]}},
+    )
+    in_flight = {row.messageId for row in queued}
+    today = datetime.now().date()
     for rr in rules:
         msg = rr.message
-        # simple cadence gate (send once per cadence per day)
-        # You can record lastSent in Message if you want stricter control.
-        send_email(msg.toEmail, msg.subject, msg.content, [])
-        db.message.update(where={"id": msg.id}, data={"sentAt": datetime.now()})
+        days = CADENCE_DAYS.get(getattr(rr.frequency, "value", rr.frequency), 1)
+        if msg.id in in_flight or (today - msg.sentAt.date()).days < days:
+            continue
+        await prisma.outboundemail.create(data=build_row(msg.toEmail, msg.subject, msg.content, message_id=msg.id))
+
+
+# ---------- Async job runner (replaces APScheduler's BackgroundScheduler thread)
+def _now() -> datetime:
+    return datetime.now(TZ) if TZ else datetime.now()
+
+def every_minutes(minutes: int) -> Callable[[datetime], datetime]:
+    """Fire on wall-clock multiples of `minutes` (like cron minute="*/N")."""
+    def next_fire(now: datetime) -> datetime:
+        base = now.replace(second=0, microsecond=0)
+        return base + timedelta(minutes=minutes - base.minute % minutes)
+    return next_fire
+
+def daily_at(hour: int, minute: int = 0) -> Callable[[datetime], datetime]:
+    def next_fire(now: datetime) -> datetime:
+        fire = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return fire if fire > now else fire + timedelta(days=1)
+    return next_fire
+
+JOBS: list[tuple[str, Callable[[datetime], datetime], Callable[[], Awaitable]]] = [
+    ("recurring_invoices", every_minutes(15), run_recurring_invoices),  # check every 15 minutes
+    ("marketing", daily_at(9), run_marketing),                          # daily 09:00
+]
+
+_tasks: list[asyncio.Task] = []
+_job_slots: asyncio.Semaphore | None = None
+
+async def _job_loop(name: str, next_fire, fn) -> None:
+    while True:
+        delay = (next_fire(_now()) - _now()).total_seconds()
+        await asyncio.sleep(max(0.0, delay))
+        started = time.perf_counter()
+        try:
+            async with _job_slots:
+                await fn()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[scheduler] job {name} failed: {e}")
+        else:
+            print(f"[scheduler] job {name} finished in {time.perf_counter() - started:.2f}s")
 
 def start():
-    scheduler.add_job(run_recurring_invoices, "cron", minute="*/15")  # check every 15 minutes
-    scheduler.add_job(run_marketing, "cron", hour="9")                # daily 09:00
-    scheduler.start()
+    """Schedule the jobs on the running event loop (call from the lifespan)."""
+    global _job_slots
+    if _tasks:
+        return
+    _job_slots = asyncio.Semaphore(SCHEDULER_CONCURRENCY)
+    for name, next_fire, fn in JOBS:
+        _tasks.append(asyncio.create_task(_job_loop(name, next_fire, fn), name=f"job:{name}"))
+
+async def stop():
+    tasks = list(_tasks)
+    _tasks.clear()
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
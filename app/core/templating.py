@@ -0,0 +1,94 @@
+# app/core/templating.py
+"""
+One Jinja environment for the whole process (pages, admin, PDF HTML), backed by an
+on-disk bytecode cache so cold starts skip template compilation.
+
+Precompile at build time so the cache ships with the deploy (package.json's
+vercel-build runs this before `next build`):
+
+    python -m app.core.templating
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+from jinja2.bccache import Bucket
+
+from app.core.assets import asset_url
+from app.core.images import responsive_img
+
+BASE_DIR = Path(__file__).resolve().parents[2]        # project root
+TEMPLATES_DIR = BASE_DIR / "app" / "templates"
+DEFAULT_CACHE_DIR = BASE_DIR / ".jinja_cache"
+
+
+class _TolerantBytecodeCache(FileSystemBytecodeCache):
+    """
+    Never fail a render because the cache dir is read-only (e.g. a Vercel bundle).
+    Entries are keyed by template name and source checksum only, not the absolute path
+    Jinja uses by default, so bytecode precompiled at build time still matches when the
+    deploy runs from a different directory.
+    """
+
+    def get_bucket(self, environment, name, filename, source) -> Bucket:
+        checksum = self.get_source_checksum(source)
+        bucket = Bucket(environment, self.get_cache_key(f"{name}|{checksum}"), checksum)
+        self.load_bytecode(bucket)
+        return bucket
+
+    def dump_bytecode(self, bucket) -> None:
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+
+def _cache_dir() -> str:
+    configured = os.getenv("JINJA_CACHE_DIR")
+    candidates = [Path(configured)] if configured else [DEFAULT_CACHE_DIR]
+    candidates.append(Path(tempfile.gettempdir()) / "dynastra_jinja_cache")
+    for path in candidates:
+        try:
+            path.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            continue
+        if path.is_dir():
+            return str(path)
+    return tempfile.gettempdir()
+
+
+env = Environment(
+    loader=FileSystemLoader(str(TEMPLATES_DIR)),
+    autoescape=select_autoescape(["html", "xml"]),
+    bytecode_cache=_TolerantBytecodeCache(_cache_dir()),
+    # Templates only change on deploy; skip the per-render mtime check unless asked.
+    auto_reload=os.getenv("JINJA_AUTO_RELOAD", "0") == "1",
+)
+
+env.globals["asset_url"] = asset_url
+env.globals["responsive_img"] = responsive_img
+
+templates = Jinja2Templates(env=env)
+
+
+def precompile() -> int:
+    """Compile every template once so its bytecode lands in the cache."""
+    count = 0
+    for name in env.list_templates(extensions=["html", "xml", "txt"]):
+        env.get_template(name)
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    n = precompile()
+    print(f"Precompiled {n} templates into {env.bytecode_cache.directory} "
+          f"in {time.perf_counter() - started:.2f}s")
+    sys.exit(0)
@@ -0,0 +1,61 @@
+# app/core/zip_stream.py
+"""
+Write a ZIP archive as a stream of byte chunks, without a seekable file or holding the
+archive in memory. Entries use data descriptors (sizes/CRC after the data), so each
+chunk can be sent as soon as it's compressed.
+
+    zs = ZipStream()
+    for part in zs.entry("a.pdf", file_chunks):
+        yield part
+    yield zs.close()
+"""
+from __future__ import annotations
+
+import io
+import zipfile
+from typing import Iterable, Iterator
+
+
+class _Sink(io.RawIOBase):
+    """Unseekable write target; zipfile falls back to streaming mode for it."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._parts.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts.clear()
+        return out
+
+
+class ZipStream:
+    def __init__(self, compresslevel: int = 1):
+        # PDFs are already compressed; a low deflate level keeps CPU cheap.
+        self._sink = _Sink()
+        self._zf = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_DEFLATED,
+                                   compresslevel=compresslevel)
+
+    def entry(self, name: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Add one file and yield archive bytes as its chunks are compressed."""
+        with self._zf.open(name, "w") as dst:
+            for chunk in chunks:
+                dst.write(chunk)
+                out = self._sink.drain()
+                if out:
+                    yield out
+        out = self._sink.drain()
+        if out:
+            yield out
+
+    def close(self) -> bytes:
+        """Finish the archive; returns the central directory bytes."""
+        self._zf.close()
+        return self._sink.drain()
@@ -1,6 +1,72 @@
+import os
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
 try:
     from app.generated.prisma import Prisma
 except ImportError:
     from prisma import Prisma
 
-prisma = Prisma()
+# One Prisma client (one query engine, one connection pool) per process, shared by
+# every router, the scheduler and background workers. Pool sizing goes through
+# Prisma's connection-string parameters so it works on any engine version.
+DB_POOL_SIZE = os.getenv("DB_POOL_SIZE")              # connection_limit
+DB_POOL_TIMEOUT = os.getenv("DB_POOL_TIMEOUT", "10")  # seconds to wait for a free connection
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+DB_QUERY_TIMEOUT = float(os.getenv("DB_QUERY_TIMEOUT", "30"))
+
+
+def _pooled_url(url: str | None) -> str | None:
+    if not url:
+        return url
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    if DB_POOL_SIZE:
+        query.setdefault("connection_limit", DB_POOL_SIZE)
+    query.setdefault("pool_timeout", DB_POOL_TIMEOUT)
+    query.setdefault("connect_timeout", str(DB_CONNECT_TIMEOUT))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _make_client() -> Prisma:
+    url = _pooled_url(os.getenv("DATABASE_URL"))
+    kwargs = {
+        "http": {"timeout": DB_QUERY_TIMEOUT},
+        "connect_timeout": DB_CONNECT_TIMEOUT,
+    }
+    if url:
+        kwargs["datasource"] = {"url": url}
+    return Prisma(**kwargs)
+
+
+prisma = _make_client()
+
+
+def _metric(items, key: str):
+    for m in items or []:
+        if getattr(m, "key", None) == key:
+            return getattr(m, "value", None)
+    return None
+
+
+async def pool_stats() -> dict:
+    """
+    Connection pool usage from the query engine's metrics
+    (needs previewFeatures = ["metrics"] in schema.prisma).
+    """
+    started = time.perf_counter()
+    metrics = await prisma.get_metrics()
+    wait = _metric(metrics.histograms, "prisma_client_queries_wait_histogram_ms")
+    wait_count = getattr(wait, "count", 0) or 0
+    wait_sum = getattr(wait, "sum", 0) or 0
+    return {
+        "connected": prisma.is_connected(),
+        "pool_size": DB_POOL_SIZE or "engine default",
+        "in_use": _metric(metrics.gauges, "prisma_pool_connections_busy"),
+        "idle": _metric(metrics.gauges, "prisma_pool_connections_idle"),
+        "open": _metric(metrics.gauges, "prisma_pool_connections_open"),
+        "waiting_queries": _metric(metrics.gauges, "prisma_client_queries_wait"),
+        "wait_ms_avg": round(wait_sum / wait_count, 3) if wait_count else 0.0,
+        "queries_total": _metric(metrics.counters, "prisma_client_queries_total"),
+        "metrics_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
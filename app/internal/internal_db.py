@@ -1,9 +1,172 @@
 # app/internal/internal_db.py
+from __future__ import annotations
 
-INTERNAL_DB = {
-    "users": [],
-    "clients": [],
-    "invoices": [],
-    "messages": [],
-    "repeat_rules": [],
-}
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+def _enum_value(v) -> str:
+    return str(getattr(v, "value", v))
+
+
+# ---------- Compact records (only the columns the admin side reads)
+@dataclass(slots=True, frozen=True)
+class UserRecord:
+    id: str
+    role: str
+    name: str
+    surname: str
+    email: str
+    phone: str
+    clientType: Optional[str]
+    status: Optional[str]
+    createdAt: datetime
+    updatedAt: Optional[datetime]
+
+    @classmethod
+    def from_model(cls, u) -> "UserRecord":
+        return cls(
+            id=u.id, role=_enum_value(u.role), name=u.name, surname=u.surname,
+            email=(u.email or "").lower(), phone=u.phone,
+            clientType=u.clientType, status=u.status,
+            createdAt=u.createdAt, updatedAt=getattr(u, "updatedAt", None),
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class ServiceRecord:
+    description: str
+    price: float
+
+
+@dataclass(slots=True, frozen=True)
+class InvoiceRecord:
+    id: str
+    clientId: str
+    invoiceType: str
+    invoiceDate: datetime
+    dueDate: datetime
+    total: float
+    sent: bool
+    pdfPath: Optional[str]
+    services: tuple[ServiceRecord, ...]
+    createdAt: datetime
+    updatedAt: datetime
+
+    @classmethod
+    def from_model(cls, inv) -> "InvoiceRecord":
+        return cls(
+            id=inv.id, clientId=inv.clientId, invoiceType=inv.invoiceType,
+            invoiceDate=inv.invoiceDate, dueDate=inv.dueDate, total=float(inv.total),
+            sent=bool(inv.sent), pdfPath=inv.pdfPath,
+            services=tuple(ServiceRecord(s.description, float(s.price)) for s in (inv.services or [])),
+            createdAt=inv.createdAt, updatedAt=inv.updatedAt,
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class MessageRecord:
+    id: str
+    subject: str
+    fromEmail: str
+    toEmail: str
+    sentAt: datetime
+
+    @classmethod
+    def from_model(cls, m) -> "MessageRecord":
+        return cls(id=m.id, subject=m.subject, fromEmail=m.fromEmail, toEmail=m.toEmail, sentAt=m.sentAt)
+
+
+@dataclass(slots=True, frozen=True)
+class RepeatRuleRecord:
+    id: str
+    messageId: str
+    frequency: str
+
+    @classmethod
+    def from_model(cls, r) -> "RepeatRuleRecord":
+        return cls(id=r.id, messageId=r.messageId, frequency=_enum_value(r.frequency))
+
+
+class InternalCache:
+    """
+    In-memory view of users, invoices, messages and repeat rules, indexed by id,
+    email and clientId. Filled once, then kept current by delta refreshes and the
+    invalidation hooks in app.internal.load_data.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self) -> None:
+        self.users: dict[str, UserRecord] = {}
+        self.user_id_by_email: dict[str, str] = {}
+        self.invoices: dict[str, InvoiceRecord] = {}
+        self.invoice_ids_by_client: dict[str, set[str]] = {}
+        self.messages: dict[str, MessageRecord] = {}
+        self.repeat_rules: dict[str, RepeatRuleRecord] = {}  # keyed by messageId
+        # High-water marks for delta refresh (None = never loaded)
+        self.users_seen: Optional[datetime] = None
+        self.invoices_seen: Optional[datetime] = None
+        self.messages_seen: Optional[datetime] = None
+        self.loaded_at: Optional[datetime] = None
+
+    # ---- users
+    def upsert_user(self, rec: UserRecord) -> None:
+        old = self.users.get(rec.id)
+        if old is not None and old.email != rec.email:
+            self.user_id_by_email.pop(old.email, None)
+        self.users[rec.id] = rec
+        self.user_id_by_email[rec.email] = rec.id
+
+    def remove_user(self, user_id: str) -> None:
+        old = self.users.pop(user_id, None)
+        if old is not None:
+            self.user_id_by_email.pop(old.email, None)
+        for inv_id in self.invoice_ids_by_client.pop(user_id, set()):
+            self.invoices.pop(inv_id, None)
+
+    def user_by_email(self, email: str) -> Optional[UserRecord]:
+        uid = self.user_id_by_email.get((email or "").strip().lower())
+        return self.users.get(uid) if uid else None
+
+    @property
+    def clients(self) -> list[UserRecord]:
+        return [u for u in self.users.values() if u.role == "CLIENT"]
+
+    # ---- invoices
+    def upsert_invoice(self, rec: InvoiceRecord) -> None:
+        old = self.invoices.get(rec.id)
+        if old is not None and old.clientId != rec.clientId:
+            self.invoice_ids_by_client.get(old.clientId, set()).discard(rec.id)
+        self.invoices[rec.id] = rec
+        self.invoice_ids_by_client.setdefault(rec.clientId, set()).add(rec.id)
+
+    def remove_invoice(self, invoice_id: str) -> None:
+        old = self.invoices.pop(invoice_id, None)
+        if old is not None:
+            self.invoice_ids_by_client.get(old.clientId, set()).discard(invoice_id)
+
+    def invoices_for_client(self, client_id: str) -> list[InvoiceRecord]:
+        ids = self.invoice_ids_by_client.get(client_id, ())
+        return sorted((self.invoices[i] for i in ids), key=lambda r: r.createdAt, reverse=True)
+
+    # ---- messages / rules
+    def upsert_message(self, rec: MessageRecord) -> None:
+        self.messages[rec.id] = rec
+
+    def upsert_repeat_rule(self, rec: RepeatRuleRecord) -> None:
+        self.repeat_rules[rec.messageId] = rec
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self.users),
+            "invoices": len(self.invoices),
+            "messages": len(self.messages),
+            "repeat_rules": len(self.repeat_rules),
+            "loaded_at": self.loaded_at,
+        }
+
+
+INTERNAL_DB = InternalCache()
@@ -1,15 +1,107 @@
 # app/internal/load_data.py
-from app.internal.internal_db import INTERNAL_DB
+from datetime import datetime, timedelta
+
+from app.internal.internal_db import (
+    INTERNAL_DB,
+    InvoiceRecord,
+    MessageRecord,
+    RepeatRuleRecord,
+    UserRecord,
+)
 from app.db import prisma
 
+# Re-read a small window behind each high-water mark so rows committed slightly
+# out of timestamp order are not missed; upserts make the overlap harmless.
+_OVERLAP = timedelta(seconds=5)
+
+
+def _since(mark):
+    return None if mark is None else mark - _OVERLAP
+
+
+def _max(mark, values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return mark
+    top = max(values)
+    return top if mark is None or top > mark else mark
+
+
+async def refresh_internal_data() -> dict:
+    """
+    Pull only rows created/updated since the last refresh (everything on the first call).
+    Assumes prisma is already connected by main.py lifespan.
+    """
+    db = INTERNAL_DB
+    counts = {"users": 0, "invoices": 0, "messages": 0}
+
+    since = _since(db.users_seen)
+    users = await prisma.user.find_many(where={"updatedAt": {"gte": since}} if since else None)
+    for u in users:
+        db.upsert_user(UserRecord.from_model(u))
+    db.users_seen = _max(db.users_seen, [u.updatedAt for u in users])
+    counts["users"] = len(users)
+
+    since = _since(db.invoices_seen)
+    invoices = await prisma.invoice.find_many(
+        where={"updatedAt": {"gte": since}} if since else None,
+        include={"services": True},
+    )
+    for inv in invoices:
+        db.upsert_invoice(InvoiceRecord.from_model(inv))
+    db.invoices_seen = _max(db.invoices_seen, [i.updatedAt for i in invoices])
+    counts["invoices"] = len(invoices)
+
+    since = _since(db.messages_seen)
+    messages = await prisma.message.find_many(where={"sentAt": {"gte": since}} if since else None)
+    for m in messages:
+        db.upsert_message(MessageRecord.from_model(m))
+    db.messages_seen = _max(db.messages_seen, [m.sentAt for m in messages])
+    counts["messages"] = len(messages)
+
+    if messages:
+        rules = await prisma.repeatrule.find_many(where={"messageId": {"in": [m.id for m in messages]}})
+        for r in rules:
+            db.upsert_repeat_rule(RepeatRuleRecord.from_model(r))
+
+    db.loaded_at = datetime.now()
+    return counts
+
+
 async def load_internal_data():
-    # Assumes prisma is already connected by main.py lifespan
+    """Full (re)load: drop the cache and fill it from scratch. Used at startup."""
     try:
-        INTERNAL_DB["users"] = await prisma.user.find_many()
-        INTERNAL_DB["clients"] = await prisma.user.find_many(where={"role": "CLIENT"})
-        INTERNAL_DB["invoices"] = await prisma.invoice.find_many(include={"services": True})
-        INTERNAL_DB["messages"] = await prisma.message.find_many()
-        INTERNAL_DB["repeat_rules"] = await prisma.repeatrule.find_many()
-        print("✅ Internal DB loaded successfully.")
+        INTERNAL_DB.clear()
+        counts = await refresh_internal_data()
+        print(f"✅ Internal DB loaded successfully: {counts}")
     except Exception as e:
         print(f"❌ Error loading data from Prisma: {e}")
+
+
+# ---------- Invalidation hooks (called by the mutation routes; never raise)
+async def invalidate_client(client_id: str) -> None:
+    try:
+        u = await prisma.user.find_unique(where={"id": client_id})
+        if u is None:
+            INTERNAL_DB.remove_user(client_id)
+        else:
+            INTERNAL_DB.upsert_user(UserRecord.from_model(u))
+    except Exception as e:
+        print(f"[internal-db] invalidate_client({client_id}) failed: {e}")
+
+
+def forget_clients(client_ids) -> None:
+    """Drop deleted clients and their invoices from the cache."""
+    for cid in client_ids:
+        INTERNAL_DB.remove_user(cid)
+
+
+async def invalidate_invoice(invoice_id: str) -> None:
+    try:
+        inv = await prisma.invoice.find_unique(where={"id": invoice_id}, include={"services": True})
+        if inv is None:
+            INTERNAL_DB.remove_invoice(invoice_id)
+        else:
+            INTERNAL_DB.upsert_invoice(InvoiceRecord.from_model(inv))
+    except Exception as e:
+        print(f"[internal-db] invalidate_invoice({invoice_id}) failed: {e}")
@@ -1,10 +1,8 @@
 from fastapi import APIRouter, Request
-from fastapi.templating import Jinja2Templates
-
-templates = Jinja2Templates(directory="app/templates")
+from app.core.page_cache import pages
 
 router = APIRouter()
 
 @router.get("/about")
 def about(request: Request):
-    return templates.TemplateResponse("pages/about.html", {"request": request})
+    return pages.response(request, "pages/about.html")
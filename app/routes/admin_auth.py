@@ -1,8 +1,7 @@
 import os
-import httpx
 from fastapi import APIRouter, Request, Form, status
 from fastapi.responses import RedirectResponse
-from app.internal.load_data import load_internal_data
+from app.internal.load_data import refresh_internal_data
 
 router = APIRouter()
 FIREBASE_API_KEY = os.getenv("FIREBASE_API_KEY")
@@ -31,6 +30,7 @@ async def login_submit(request: Request, email: str = Form(...), password: str =
         )
 
     # 1) Firebase email+password auth
+    import httpx  # deferred: only the login POST needs it
     try:
         async with httpx.AsyncClient(timeout=10) as client:
             resp = await client.post(
@@ -61,14 +61,14 @@ async def login_submit(request: Request, email: str = Form(...), password: str =
             {"request": request, "error": "You are not authorized to access this area."},
         )
 
-    # 3) Set session + load internal data (non-fatal)
+    # 3) Set session + pull changes into the internal cache (non-fatal)
     request.session["is_admin"] = True
     request.session["user_email"] = email
 
     try:
-        await load_internal_data()
+        await refresh_internal_data()
     except Exception as e:
-        print(f"[LOGIN] load_internal_data() failed: {e}")
+        print(f"[LOGIN] refresh_internal_data() failed: {e}")
 
     # 4) Redirect to dashboard
     return RedirectResponse("/admin/dashboard", status_code=status.HTTP_303_SEE_OTHER)
@@ -2,8 +2,12 @@
 import json
 from datetime import datetime
 from fastapi import APIRouter, Request, Form, HTTPException
-from fastapi.responses import RedirectResponse, HTMLResponse
+from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse
 from app.db import prisma
+from app.core import revenue_summary
+from app.core.client_search import client_json, search_clients
+from app.core.pagination import paginate, page_size, sort_direction
+from app.internal.load_data import invalidate_client, forget_clients
 
 router = APIRouter(prefix="/admin", tags=["clients"])
 
@@ -14,16 +18,56 @@ def _require_admin(request: Request):
     return request.session.get("is_admin", False)
 
 # ---------- List Clients (your existing page uses this)
+CLIENT_SORTS = ("createdAt", "name", "surname", "email")
+
 @router.get("/clients", response_class=HTMLResponse)
-async def client_list(request: Request):
+async def client_list(
+    request: Request,
+    status: str | None = None,
+    client_type: str | None = None,
+    sort: str = "createdAt",
+    dir: str = "desc",
+    cursor: str | None = None,
+    limit: int | None = None,
+):
     if not _require_admin(request):
         return RedirectResponse("/admin/login", status_code=303)
-    clients = await prisma.user.find_many(order={"createdAt": "desc"})
+
+    sort = sort if sort in CLIENT_SORTS else "createdAt"
+    where = {}
+    if status:
+        where["status"] = status
+    if client_type:
+        where["clientType"] = client_type
+
+    clients, next_cursor = await paginate(
+        prisma.user,
+        where=where,
+        sort=sort,
+        direction=sort_direction(dir),
+        cursor=cursor,
+        limit=page_size(limit),
+    )
     return _templates(request).TemplateResponse(
         "admin/client_list.html",
-        {"request": request, "clients": clients},
+        {
+            "request": request,
+            "clients": clients,
+            "filters": {"status": status or "", "client_type": client_type or "", "sort": sort, "dir": sort_direction(dir)},
+            "sorts": CLIENT_SORTS,
+            "next_url": str(request.url.include_query_params(cursor=next_cursor)) if next_cursor else None,
+            "first_url": str(request.url.remove_query_params("cursor")) if cursor else None,
+        },
     )
 
+# ---------- Typeahead search (invoice form, marketing)
+@router.get("/clients/search")
+async def client_search(request: Request, q: str = "", limit: int | None = None):
+    if not _require_admin(request):
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    users = await search_clients(q, limit)
+    return JSONResponse({"results": [client_json(u) for u in users]})
+
 # ---------- Create: show form
 @router.get("/client/new", response_class=HTMLResponse)
 async def client_new(request: Request):
@@ -66,7 +110,7 @@ async def client_save(
         except Exception:
             dob_dt = None
 
-    await prisma.user.create(
+    client = await prisma.user.create(
         data={
             "name": name.strip(),
             "surname": surname.strip(),
@@ -82,6 +126,7 @@ async def client_save(
             "description": description or None,
         }
     )
+    await invalidate_client(client.id)
     return RedirectResponse("/admin/clients", status_code=303)
 
 # ---------- Edit: show form (reuses your new_client.html)
@@ -147,6 +192,7 @@ async def client_update(
             "description": description or None,
         },
     )
+    await invalidate_client(client_id)
     return RedirectResponse("/admin/clients", status_code=303)
 
 # ---------- Delete (simple)
@@ -158,24 +204,57 @@ async def client_delete_get(request: Request, client_id: str):
     # Optional: redirect instead of deleting via GET
     return RedirectResponse("/admin/clients", status_code=303)
 
+async def _delete_clients(client_ids: list[str]) -> None:
+    """
+    Remove clients with their services, recurring schedules and invoices in a
+    constant number of set-based statements inside one transaction.
+    Falls back to a soft-delete if the hard delete is rejected.
+    """
+    ids = list(dict.fromkeys(i for i in client_ids if i))
+    if not ids:
+        return
+    owned = {"invoice": {"is": {"clientId": {"in": ids}}}}
+    summary_ok = True
+    try:
+        async with prisma.tx() as tx:
+            summary_ok = await revenue_summary.clients_deleted(tx, ids)
+            await tx.service.delete_many(where=owned)
+            await tx.recurringinvoice.delete_many(where=owned)
+            await tx.invoice.delete_many(where={"clientId": {"in": ids}})
+            await tx.user.delete_many(where={"id": {"in": ids}})
+    except Exception as e:
+        print(f"[clients] hard delete failed, soft-deleting {len(ids)} client(s): {e}")
+        await prisma.user.update_many(where={"id": {"in": ids}}, data={"status": "Deleted"})
+        summary_ok = True   # rolled back with the delete; soft-deleted invoices still count
+    forget_clients(ids)
+    for cid in ids:
+        await invalidate_client(cid)
+    if not summary_ok:
+        try:
+            await revenue_summary.rebuild()
+        except Exception as e:
+            print(f"[revenue] rebuild after client delete failed: {e}")
+
 # NEW: real delete happens via POST + confirm()
 @router.post("/client/delete/{client_id}")
 async def client_delete_post(request: Request, client_id: str):
     if not request.session.get("is_admin"):
         return RedirectResponse("/admin/login", status_code=303)
 
-    # delete invoices + children first to avoid FK issues
-    invoices = await prisma.invoice.find_many(where={"clientId": client_id})
-    for inv in invoices:
-        await prisma.service.delete_many(where={"invoiceId": inv.id})
-        await prisma.recurringinvoice.delete_many(where={"invoiceId": inv.id})
-        await prisma.invoice.delete(where={"id": inv.id})
+    await _delete_clients([client_id])
+    return RedirectResponse("/admin/clients", status_code=303)
+
+# Bulk: "delete selected clients" from the list page
+MAX_BULK_DELETE = 1000
 
-    # finally delete client (or soft-delete fallback)
-    try:
-        await prisma.user.delete(where={"id": client_id})
-    except Exception:
-        await prisma.user.update(where={"id": client_id}, data={"status": "Deleted"})
+@router.post("/clients/delete")
+async def clients_bulk_delete(request: Request, client_ids: list[str] = Form(default=[])):
+    if not _require_admin(request):
+        return RedirectResponse("/admin/login", status_code=303)
+    if len(client_ids) > MAX_BULK_DELETE:
+        raise HTTPException(400, f"At most {MAX_BULK_DELETE} clients per request")
+
+    await _delete_clients(client_ids)
     return RedirectResponse("/admin/clients", status_code=303)
 
 # ---------- View Invoices for a client
@@ -0,0 +1,59 @@
+# app/routes/admin_export.py
+import os
+from datetime import datetime
+
+from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.core.export import ExportTooLarge, csv_chunks, export_where, resolve_columns, xlsx_file
+
+router = APIRouter(prefix="/admin", tags=["export"])
+
+XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+# ---------- CSV / XLSX export of clients, invoices or service lines
+# /admin/export/services.csv?columns=id,invoiceDate,price&client_id=...&date_from=2026-01-01
+@router.get("/export/{entity}.{fmt}")
+async def export_table(
+    request: Request,
+    entity: str,
+    fmt: str,
+    columns: str | None = None,
+    status: str | None = None,
+    client_type: str | None = None,
+    role: str | None = None,
+    sent: str | None = None,
+    client_id: str | None = None,
+    invoice_id: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+):
+    if not request.session.get("is_admin"):
+        return RedirectResponse("/admin/login", status_code=303)
+    if fmt not in ("csv", "xlsx"):
+        raise HTTPException(404, "Export format must be csv or xlsx")
+    try:
+        cols = resolve_columns(entity, columns)
+        where = export_where(
+            entity, status=status, client_type=client_type, role=role, sent=sent,
+            client_id=client_id, invoice_id=invoice_id, date_from=date_from, date_to=date_to,
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    filename = f"{entity}_{datetime.now().strftime('%Y%m%d-%H%M')}.{fmt}"
+    disposition = {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+    if fmt == "csv":
+        return StreamingResponse(csv_chunks(entity, cols, where), media_type="text/csv; charset=utf-8",
+                                 headers=disposition)
+
+    try:
+        path = await xlsx_file(entity, cols, where)
+    except ExportTooLarge as e:
+        raise HTTPException(413, str(e))
+    except RuntimeError as e:
+        raise HTTPException(501, str(e))
+    return FileResponse(path, media_type=XLSX_TYPE, filename=filename,
+                        background=BackgroundTask(os.unlink, path))
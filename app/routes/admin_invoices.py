@@ -1,14 +1,21 @@
 # app/routes/admin_invoices.py
 import os
-from datetime import datetime
+import re
+import uuid
+from datetime import datetime, timedelta
 from typing import Optional
 
 from fastapi import APIRouter, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 
 from app.db import prisma
-from app.core.email_utils import send_email
-from app.core.pdf_utils2 import render_invoice_html, html_to_pdf
+from app.core import mail_queue, offload, pdf_cache, revenue_summary
+from app.core.scheduler import roll_date
+from app.core.pdf_stream import invoice_pdf_context, invoice_pdf_response, render_to_bytes
+from app.core.pagination import paginate, page_size, sort_direction
+from app.core.zip_stream import ZipStream
+from app.core.pdf_utils2 import pdf_engine, render_invoice_pdf
+from app.internal.load_data import invalidate_invoice
 
 router = APIRouter(prefix="/admin", tags=["invoices"])
 
@@ -22,35 +29,170 @@ def _money(v: str | float) -> float:
     return round(float(v), 2)
 
 
+def _parse_date(v: str | None) -> datetime | None:
+    if not v:
+        return None
+    try:
+        return datetime.fromisoformat(v)
+    except ValueError:
+        return None
+
+
 # ---------- List (optional page)
+INVOICE_SORTS = ("createdAt", "invoiceDate", "dueDate", "total")
+
 @router.get("/invoices", response_class=HTMLResponse)
-async def invoice_index(request: Request):
-    invs = await prisma.invoice.find_many(
+async def invoice_index(
+    request: Request,
+    sent: str | None = None,
+    client_id: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    sort: str = "createdAt",
+    dir: str = "desc",
+    cursor: str | None = None,
+    limit: int | None = None,
+):
+    sort = sort if sort in INVOICE_SORTS else "createdAt"
+    where: dict = {}
+    if sent in ("1", "0"):
+        where["sent"] = sent == "1"
+    if client_id:
+        where["clientId"] = client_id
+    date_range = {}
+    if _parse_date(date_from):
+        date_range["gte"] = _parse_date(date_from)
+    if _parse_date(date_to):
+        date_range["lt"] = _parse_date(date_to) + timedelta(days=1)
+    if date_range:
+        where["invoiceDate"] = date_range
+
+    invs, next_cursor = await paginate(
+        prisma.invoice,
+        where=where,
+        sort=sort,
+        direction=sort_direction(dir),
+        cursor=cursor,
+        limit=page_size(limit),
         include={"client": True},
-        order={"createdAt": "desc"},
     )
     return _templates(request).TemplateResponse(
         "admin/invoice_list.html",
-        {"request": request, "invoices": invs},
+        {
+            "request": request,
+            "invoices": invs,
+            "filters": {
+                "sent": sent or "", "client_id": client_id or "",
+                "date_from": date_from or "", "date_to": date_to or "",
+                "sort": sort, "dir": sort_direction(dir),
+            },
+            "sorts": INVOICE_SORTS,
+            "next_url": str(request.url.include_query_params(cursor=next_cursor)) if next_cursor else None,
+            "first_url": str(request.url.remove_query_params("cursor")) if cursor else None,
+        },
+    )
+
+
+# ---------- Export: every invoice PDF in a date range as one streamed ZIP
+EXPORT_CHUNK = 50
+FILE_CHUNK = 64 * 1024
+
+
+def _export_name(invoice) -> str:
+    client = invoice.client
+    who = re.sub(r"[^A-Za-z0-9]+", "-", f"{client.name} {client.surname}").strip("-") or "client"
+    number = f"INV-{invoice.invoiceDate.strftime('%Y%m%d')}-{invoice.id[:6].upper()}"
+    return f"{invoice.invoiceDate.strftime('%Y-%m-%d')}_{number}_{who}.pdf"
+
+
+def _export_source(invoice) -> tuple[str | None, bytes | None]:
+    """Stored pdfPath, else a cached render, else a fresh in-memory render (blocking)."""
+    if invoice.pdfPath and os.path.exists(invoice.pdfPath):
+        return invoice.pdfPath, None
+    ctx = invoice_pdf_context(invoice)
+    path, hit = pdf_cache.lookup(ctx)
+    if hit:
+        return path, None
+    return None, render_to_bytes(ctx)
+
+
+def _file_chunks(path: str):
+    with open(path, "rb") as f:
+        while chunk := f.read(FILE_CHUNK):
+            yield chunk
+
+
+@router.get("/invoices/export.zip")
+async def invoice_export_zip(
+    request: Request,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    client_id: str | None = None,
+):
+    if not request.session.get("is_admin"):
+        return RedirectResponse("/admin/login", status_code=303)
+    start, end = _parse_date(date_from), _parse_date(date_to)
+    if not start or not end or end < start:
+        raise HTTPException(400, "date_from and date_to (YYYY-MM-DD) are required")
+    where: dict = {"invoiceDate": {"gte": start, "lt": end + timedelta(days=1)}}
+    if client_id:
+        where["clientId"] = client_id
+
+    async def body():
+        # Invoices are fetched in keyset chunks and each PDF is written as one ZIP entry
+        # and sent straight away, so memory stays flat however many invoices match.
+        zs = ZipStream()
+        failed: list[str] = []
+        cursor = None
+        while True:
+            invs, cursor = await paginate(
+                prisma.invoice,
+                where=where,
+                sort="invoiceDate",
+                direction="asc",
+                cursor=cursor,
+                limit=EXPORT_CHUNK,
+                include={"client": True, "services": True},
+            )
+            for inv in invs:
+                try:
+                    path, data = await offload.run_render(_export_source, inv)
+                except Exception as e:
+                    failed.append(f"{inv.id}: {e}")
+                    continue
+                for part in zs.entry(_export_name(inv), _file_chunks(path) if path else [data]):
+                    yield part
+            if not cursor:
+                break
+        if failed:
+            for part in zs.entry("errors.txt", ["\n".join(failed).encode("utf-8")]):
+                yield part
+        yield zs.close()
+
+    filename = f"invoices_{start.strftime('%Y%m%d')}-{end.strftime('%Y%m%d')}.zip"
+    return StreamingResponse(
+        body(),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
 # ---------- Create forms
+# The client is picked through /admin/clients/search; only a preselected one is loaded here.
 @router.get("/invoice/create", response_class=HTMLResponse)
 async def invoice_form_blank(request: Request):
-    clients = await prisma.user.find_many()
     return _templates(request).TemplateResponse(
         "admin/invoice_form.html",
-        {"request": request, "clients": clients, "preselect_client_id": None},
+        {"request": request, "client": None},
     )
 
 
 @router.get("/invoice/create/{client_id}", response_class=HTMLResponse)
 async def invoice_form_for_client(request: Request, client_id: str):
-    clients = await prisma.user.find_many()
+    client = await prisma.user.find_unique(where={"id": client_id})
     return _templates(request).TemplateResponse(
         "admin/invoice_form.html",
-        {"request": request, "clients": clients, "preselect_client_id": client_id},
+        {"request": request, "client": client},
     )
 
 
@@ -65,13 +207,14 @@ async def invoice_preview(
     # multiple fields with the same name build a list:
     service_description: list[str] = Form(default=[]),
     service_price: list[str] = Form(default=[]),
+    invoice_type: str = Form("ONE_TIME"),        # ONE_TIME | MONTHLY | ANNUAL
+    recurring: bool = Form(False),
 ):
     client = await prisma.user.find_unique(where={"id": client_id})
     if not client:
-        clients = await prisma.user.find_many()
         return _templates(request).TemplateResponse(
             "admin/invoice_form.html",
-            {"request": request, "clients": clients, "error": "Client not found"},
+            {"request": request, "client": None, "error": "Client not found"},
         )
 
     services = [
@@ -93,6 +236,8 @@ async def invoice_preview(
         "issue_date": issue_date,
         "due_date": due_date,
         "notes": notes or "",
+        "invoice_type": invoice_type,
+        "recurring": recurring,
         "company_name": os.getenv("COMPANY_NAME"),
         "company_email": os.getenv("COMPANY_EMAIL"),
         "company_site": os.getenv("COMPANY_SITE"),
@@ -117,6 +262,7 @@ async def invoice_save(
     service_description: list[str] = Form(default=[]),
     service_price: list[str] = Form(default=[]),
     invoice_type: str = Form("ONE_TIME"),
+    recurring: bool = Form(False),
 ):
     client = await prisma.user.find_unique(where={"id": client_id})
     if not client:
@@ -146,6 +292,16 @@ async def invoice_save(
         },
         include={"client": True, "services": True},
     )
+    await invalidate_invoice(inv.id)
+    await revenue_summary.invoice_created(inv)
+
+    if recurring and invoice_type in ("MONTHLY", "ANNUAL"):
+        frequency = "monthly" if invoice_type == "MONTHLY" else "annual"
+        await prisma.recurringinvoice.create(
+            data={"invoiceId": inv.id, "frequency": frequency, "nextRun": roll_date(inv.invoiceDate, frequency)}
+        )
+        await revenue_summary.schedule_created(inv, frequency)
+
     return RedirectResponse(f"/admin/invoice/{inv.id}/preview", status_code=303)
 
 
@@ -222,32 +378,65 @@ def _default_body(invoice) -> str:
 
 def _generate_invoice_pdf(request: Request, invoice, ctx: dict) -> str | None:
     """
-    Try WeasyPrint; if it fails (e.g., missing GTK on Windows), try ReportLab fallback.
+    Reuse a cached PDF when the render context is unchanged; otherwise render with
+    PDF_ENGINE and, if WeasyPrint fails (e.g., missing GTK on Windows), with ReportLab.
     Returns the file path or None.
     """
     out_dir = os.getenv("PDF_OUTPUT_DIR", "app/static/invoices")
     os.makedirs(out_dir, exist_ok=True)
-    pdf_path = os.path.join(out_dir, f"{invoice.id}.pdf")
+    engine = pdf_engine()
+    pdf_path, hit = pdf_cache.lookup(ctx, out_dir, engine)
+    if hit:
+        return pdf_path
+    # Unique per call: the render pool runs several sends of one invoice at once.
+    tmp_path = f"{pdf_path}.{uuid.uuid4().hex[:8]}.tmp"
 
-    # Try WeasyPrint (html_to_pdf)
     try:
-        html = render_invoice_html({**ctx, "request": request})
-        html_to_pdf(html, pdf_path)
-        return pdf_path
+        render_invoice_pdf({**ctx, "request": request}, tmp_path, engine)
+        return pdf_cache.store(tmp_path, pdf_path)
     except Exception as e:
-        print("WeasyPrint failed:", e)
-
-    # Fallback to ReportLab if available
+        print(f"{engine} PDF render failed:", e)
+        _discard(tmp_path)
+        if engine == "reportlab":
+            return None
+
+    # Fallback to ReportLab, cached under the ReportLab digest so a transient WeasyPrint
+    # failure doesn't pin this layout for the WeasyPrint entry.
+    pdf_path, hit = pdf_cache.lookup(ctx, out_dir, "reportlab")
+    if hit:
+        return pdf_path
+    tmp_path = f"{pdf_path}.{uuid.uuid4().hex[:8]}.tmp"
     try:
-        from app.core.pdf_utils2 import simple_invoice_pdf  # optional helper you can add
-        simple_invoice_pdf(invoice, invoice.services, invoice.client, ctx, pdf_path)
+        render_invoice_pdf(ctx, tmp_path, "reportlab")
         print("ReportLab fallback PDF created:", pdf_path)
-        return pdf_path
+        return pdf_cache.store(tmp_path, pdf_path)
     except Exception as e2:
         print("ReportLab fallback failed:", e2)
+        _discard(tmp_path)
         return None
 
 
+def _discard(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# ---------- Download (stored file, cached PDF, or rendered in memory)
+@router.get("/invoice/{invoice_id}/pdf")
+async def invoice_pdf(request: Request, invoice_id: str):
+    if not request.session.get("is_admin"):
+        return RedirectResponse("/admin/login", status_code=303)
+    invoice = await prisma.invoice.find_unique(
+        where={"id": invoice_id},
+        include={"client": True, "services": True},
+    )
+    if not invoice:
+        raise HTTPException(404, "Invoice not found")
+    return await invoice_pdf_response(request, invoice)
+
+
 # ---------- Send
 @router.post("/invoice/send/{invoice_id}")
 async def invoice_send(
@@ -288,18 +477,15 @@ async def invoice_send(
         "notes": "",
     }
 
-    pdf_path = _generate_invoice_pdf(request, invoice, ctx)
+    pdf_path = await offload.run_render(_generate_invoice_pdf, request, invoice, ctx)
     attachments = [pdf_path] if (pdf_path and os.path.exists(pdf_path)) else []
 
+    # The mail queue worker delivers it; once the provider accepts it the worker marks
+    # the invoice sent, stores pdfPath and counts the revenue.
     try:
-        send_email(invoice.client.email, subject, body, attachments=attachments)
+        await mail_queue.enqueue(invoice.client.email, subject, body, attachments, invoice_id=invoice.id)
     except Exception as e:
-        print("Email send failed:", e)
+        print("Email enqueue failed:", e)
         # Don’t 500 the page—redirect with a flag you can show in the UI
         return RedirectResponse(f"/admin/invoice/{invoice.id}/preview?sent=0", status_code=303)
-
-    await prisma.invoice.update(
-        where={"id": invoice.id},
-        data={"sent": True, "pdfPath": (pdf_path or None)},
-    )
     return RedirectResponse(f"/admin/invoice/{invoice.id}/preview?sent=1", status_code=303)
@@ -1,8 +1,10 @@
 # app/routes/admin_marketing.py
 from fastapi import APIRouter, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
 from app.db import prisma
-from app.core.email_utils import send_email
+from app.core import mail_queue
+from app.core.client_search import search_clients
+from app.core.pagination import paginate, page_size
 
 router = APIRouter(prefix="/admin", tags=["marketing"])
 
@@ -13,14 +15,25 @@ def _require_admin(request: Request):
     return request.session.get("is_admin", False)
 
 # Optional index page (not required by your buttons)
+# Newest clients a page at a time; ?q= (and the typeahead box) searches instead.
 @router.get("/marketing", response_class=HTMLResponse)
-async def marketing_index(request: Request):
+async def marketing_index(request: Request, q: str = "", cursor: str | None = None, limit: int | None = None):
     if not _require_admin(request):
         return RedirectResponse("/admin/login", status_code=303)
-    clients = await prisma.user.find_many()
+    next_cursor = None
+    if q.strip():
+        clients = await search_clients(q, page_size(limit))
+    else:
+        clients, next_cursor = await paginate(prisma.user, cursor=cursor, limit=page_size(limit))
     return _templates(request).TemplateResponse(
         "admin/marketing_index.html",
-        {"request": request, "clients": clients},
+        {
+            "request": request,
+            "clients": clients,
+            "q": q,
+            "next_url": str(request.url.include_query_params(cursor=next_cursor)) if next_cursor else None,
+            "first_url": str(request.url.remove_query_params("cursor")) if cursor else None,
+        },
     )
 
 # Send form for a single client
@@ -64,9 +77,9 @@ async def marketing_send(
 
     ok = True
     try:
-        send_email(client.email, subject, f"<pre style='font-family:inherit;white-space:pre-wrap'>{body}</pre>")
+        await mail_queue.enqueue(client.email, subject, f"<pre style='font-family:inherit;white-space:pre-wrap'>{body}</pre>")
     except Exception as e:
-        print("Marketing email failed:", e)
+        print("Marketing email enqueue failed:", e)
         ok = False
 
     templates = [
@@ -77,3 +90,10 @@ async def marketing_send(
         "admin/marketing_form.html",
         {"request": request, "client": client, "templates": templates, "sent": ok, "error": None if ok else "Send failed"},
     )
+
+# Outbound queue depth / throughput (JSON)
+@router.get("/mail-queue/metrics")
+async def mail_queue_metrics(request: Request):
+    if not _require_admin(request):
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    return await mail_queue.metrics()
@@ -1,19 +1,17 @@
 from fastapi import APIRouter, Request, Form
-from fastapi.templating import Jinja2Templates
+from app.core.templating import templates
+from app.core.page_cache import pages
 from fastapi.responses import HTMLResponse
-import resend
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
-resend.api_key = os.getenv("RESEND_API_KEY")
 
-templates = Jinja2Templates(directory="app/templates")
 router = APIRouter()
 
 @router.get("/contact", response_class=HTMLResponse)
 def contact_get(request: Request):
-    return templates.TemplateResponse("pages/contact.html", {"request": request, "submitted": False})
+    return pages.response(request, "pages/contact.html", {"submitted": False})
 
 @router.post("/contact", response_class=HTMLResponse)
 def contact_post(
@@ -23,6 +21,8 @@ def contact_post(
     subject: str = Form("New Contact Form Submission"),
     message: str = Form(...)
 ):
+    import resend  # only needed on submit; keeps it off the cold-start path
+    resend.api_key = os.getenv("RESEND_API_KEY")
     resend.Emails.send({
         "from": os.getenv("FROM_EMAIL"),
         "to": os.getenv("TO_EMAIL"),
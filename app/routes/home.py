@@ -1,11 +1,9 @@
 from fastapi import APIRouter, Request
-from fastapi.templating import Jinja2Templates
+from app.core.page_cache import pages
 from fastapi.responses import HTMLResponse
 
-templates = Jinja2Templates(directory="app/templates")
-
 router = APIRouter()
 
 @router.get("/", response_class=HTMLResponse)
 def home(request: Request):
-    return templates.TemplateResponse("pages/home.html", {"request": request})
+    return pages.response(request, "pages/home.html")
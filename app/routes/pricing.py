@@ -1,10 +1,8 @@
 from fastapi import APIRouter, Request
-from fastapi.templating import Jinja2Templates
-
-templates = Jinja2Templates(directory="app/templates")
+from app.core.page_cache import pages
 
 router = APIRouter()
 
 @router.get("/pricing")
 def pricing(request: Request):
-    return templates.TemplateResponse("pages/pricing.html", {"request": request})
+    return pages.response(request, "pages/pricing.html")
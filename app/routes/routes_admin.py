@@ -1,23 +1,19 @@
 from fastapi import APIRouter, Request, Form, Depends, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
 from prisma import Prisma
+from app.db import prisma
 from datetime import datetime, timedelta, date
 import os, math, uuid
 
+from app.core import revenue_summary
 from app.core.email_utils import send_email
-from app.core.pdf_utils2 import render_invoice_html, html_to_pdf
+from app.core.pdf_utils2 import render_invoice_pdf
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
-def db_dep():
-    db = Prisma()
-    if not db.is_connected():
-        db.connect()
-    try:
-        yield db
-    finally:
-        # keep connection for performance if you prefer; explicit close on shutdown
-        ...
+async def db_dep():
+    # Shared, pooled client from app.db (connected once in main.py lifespan)
+    yield prisma
 
 def money(v: str | float) -> float:
     return round(float(v), 2)
@@ -73,16 +69,15 @@ async def client_create(
 # ---------- Invoices ----------
 @router.get("/invoice/create/{client_id}", response_class=HTMLResponse)
 async def invoice_form(request: Request, client_id: str, db: Prisma = Depends(db_dep)):
-    clients = await db.user.find_many()
+    client = await db.user.find_unique(where={"id": client_id})
     return request.app.state.templates.TemplateResponse("admin/invoice_form.html", {
-        "request": request, "clients": clients, "preselect_client_id": client_id
+        "request": request, "client": client
     })
 
 @router.get("/invoice/create", response_class=HTMLResponse)
 async def invoice_form_blank(request: Request, db: Prisma = Depends(db_dep)):
-    clients = await db.user.find_many()
     return request.app.state.templates.TemplateResponse("admin/invoice_form.html", {
-        "request": request, "clients": clients, "preselect_client_id": None
+        "request": request, "client": None
     })
 
 @router.post("/invoice/preview", response_class=HTMLResponse)
@@ -162,12 +157,14 @@ async def invoice_save(
         },
         include={ "services": True, "client": True }
     )
+    await revenue_summary.invoice_created(inv)
 
     if recurring and invoice_type in ("MONTHLY", "ANNUAL"):
         next_run = (datetime.fromisoformat(issue_date) + (timedelta(days=30) if invoice_type=="MONTHLY" else timedelta(days=365)))
         await db.recurringinvoice.create(
             data={"invoiceId": inv.id, "frequency": "monthly" if invoice_type=="MONTHLY" else "annual", "nextRun": next_run}
         )
+        await revenue_summary.schedule_created(inv, "monthly" if invoice_type=="MONTHLY" else "annual")
 
     return RedirectResponse(f"/admin/invoice/{inv.id}/preview", status_code=303)
 
@@ -226,11 +223,10 @@ async def invoice_send(invoice_id: str, request: Request, db: Prisma = Depends(d
         "notes": "",
     }
 
-    # 1) HTML → PDF
-    html = render_invoice_html(context)
+    # 1) Render PDF (PDF_ENGINE)
     out_dir = os.getenv("PDF_OUTPUT_DIR", "/app/static/invoices")
     pdf_path = os.path.join(out_dir, f"{invoice.id}.pdf")
-    html_to_pdf(html, pdf_path)
+    render_invoice_pdf(context, pdf_path)
 
     # 2) Send email
     subject = f"Invoice {invoice.invoiceDate.strftime('%Y%m%d')}-{invoice.id[:6]} — £{invoice.total:.2f}"
@@ -248,6 +244,8 @@ async def invoice_send(invoice_id: str, request: Request, db: Prisma = Depends(d
     send_email(invoice.client.email, subject, body, attachments=[pdf_path])
 
     await db.invoice.update(where={"id": invoice.id}, data={"sent": True, "pdfPath": pdf_path})
+    if not invoice.sent:
+        await revenue_summary.invoice_sent(invoice)
     return RedirectResponse(f"/admin/invoice/{invoice.id}/preview", status_code=303)
 
 # ---------- Marketing ----------
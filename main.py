@@ -1,6 +1,7 @@
 # main.py
 from contextlib import asynccontextmanager
 from datetime import datetime
+from functools import lru_cache
 import os
 import asyncio
 from pathlib import Path
@@ -8,12 +9,15 @@ from types import SimpleNamespace
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import RedirectResponse, HTMLResponse
+from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse
 from starlette.middleware.sessions import SessionMiddleware
 from dotenv import load_dotenv
 
+from app.core import offload
+from app.core.assets import AssetFiles
+from app.core.page_cache import pages as page_cache
+from app.core.templating import templates
+
 # Public routers
 from app.routes import home as home_routes, about, services, pricing, contact
 
@@ -29,17 +33,29 @@ def _is_vercel() -> bool:
     return os.getenv("VERCEL") == "1"
 
 
+# Memoized: router registration at import and the lifespan share one load. A failed
+# load isn't cached, so the lifespan retries it once.
+@lru_cache(maxsize=1)
 def _load_admin_stack():
-    from app.db import prisma
+    from app.db import prisma, pool_stats
     from app.internal.load_data import load_internal_data
     from app.core import scheduler
-    from app.routes import admin_auth, admin_clients, admin_invoices, admin_marketing
+    from app.core.email_utils import close_smtp_pool, open_async_clients, close_async_clients
+    from app.core import mail_queue, revenue_summary
+    from app.routes import admin_auth, admin_clients, admin_export, admin_invoices, admin_marketing
 
     return SimpleNamespace(
         prisma=prisma,
+        pool_stats=pool_stats,
         load_internal_data=load_internal_data,
         scheduler=scheduler,
-        routers=[admin_marketing.router, admin_invoices.router, admin_clients.router, admin_auth.router],
+        close_smtp_pool=close_smtp_pool,
+        open_async_clients=open_async_clients,
+        close_async_clients=close_async_clients,
+        mail_queue=mail_queue,
+        revenue_summary=revenue_summary,
+        routers=[admin_marketing.router, admin_invoices.router, admin_clients.router, admin_export.router,
+                 admin_auth.router],
     )
 
 @asynccontextmanager
@@ -48,12 +64,24 @@ async def lifespan(app: FastAPI):
     app.state.admin_available = False
     app.state.admin_error = None
     app.state.prisma = None
+    app.state.pool_stats = None
+    app.state.revenue_summary = None
     app.state.scheduler = None
+    app.state.mail_queue_task = None
+    mail_queue_stop = asyncio.Event()
+
+    # Public pages only depend on the year; render them once before taking traffic.
+    try:
+        print(f"✅ Pre-rendered {page_cache.warm()} public pages")
+    except Exception as exc:
+        print(f"⚠️ Page warm-up failed: {exc}")
 
     try:
         admin_stack = _load_admin_stack()
         app.state.admin_available = True
         app.state.prisma = admin_stack.prisma
+        app.state.pool_stats = admin_stack.pool_stats
+        app.state.revenue_summary = admin_stack.revenue_summary
         app.state.scheduler = admin_stack.scheduler
     except Exception as exc:
         app.state.admin_error = str(exc)
@@ -71,17 +99,22 @@ async def lifespan(app: FastAPI):
             app.state.db_available = False
             print(f"⚠️ Database startup skipped: {exc}")
 
+    if admin_stack is not None:
+        await admin_stack.open_async_clients()
+
     # Warm internal cache without blocking startup on long-running environments.
     if admin_stack is not None and app.state.db_available and not _is_vercel():
         asyncio.create_task(admin_stack.load_internal_data())
 
-        # APScheduler is not suitable for Vercel's serverless runtime.
+        # Long-lived job tasks are not suitable for Vercel's serverless runtime.
         try:
             admin_stack.scheduler.start()
             print("⏰ Scheduler started.")
         except Exception as exc:
             print(f"⚠️ Scheduler startup skipped: {exc}")
 
+        app.state.mail_queue_task = asyncio.create_task(admin_stack.mail_queue.run_worker(mail_queue_stop))
+
     try:
         yield
     finally:
@@ -89,10 +122,22 @@ async def lifespan(app: FastAPI):
         if admin_stack is not None and not _is_vercel():
             print("🛑 Stopping scheduler...")
             try:
-                admin_stack.scheduler.scheduler.shutdown(wait=False)
+                await admin_stack.scheduler.stop()
             except Exception:
                 pass
 
+        if app.state.mail_queue_task is not None:
+            mail_queue_stop.set()
+            try:
+                await asyncio.wait_for(app.state.mail_queue_task, timeout=10)
+            except Exception:
+                app.state.mail_queue_task.cancel()
+
+        offload.shutdown()
+        if admin_stack is not None:
+            admin_stack.close_smtp_pool()
+            await admin_stack.close_async_clients()
+
         if admin_stack is not None and app.state.db_available:
             print("🔌 Disconnecting from the database...")
             try:
@@ -119,8 +164,8 @@ app.add_middleware(
 )
 
 # Static & templates
-app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
-templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+# Hashed files from `python -m app.core.assets` are served precompressed and immutable.
+app.mount("/static", AssetFiles(directory=str(STATIC_DIR)), name="static")
 templates.env.globals["current_year"] = datetime.now().year
 # expose templates both ways (for old/new code paths)
 app.templates = templates
@@ -140,7 +185,7 @@ def root():
 # Home
 @app.get("/", response_class=HTMLResponse)
 def home(request: Request):
-    return app.templates.TemplateResponse("pages/home.html", {"request": request})
+    return page_cache.response(request, "pages/home.html")
 
 # Legacy login redirect
 @app.get("/login")
@@ -154,7 +199,26 @@ async def admin_dashboard(request: Request):
         return HTMLResponse("Admin temporarily unavailable on this deployment.", status_code=503)
     if not request.session.get("is_admin"):
         return RedirectResponse("/admin/login", status_code=303)
-    return app.templates.TemplateResponse("admin/dashboard.html", {"request": request})
+    # Reads the precomputed RevenueSummary rows; no aggregation over Invoice/Service here.
+    summary = None
+    if request.app.state.db_available and request.app.state.revenue_summary is not None:
+        try:
+            summary = await request.app.state.revenue_summary.dashboard()
+        except Exception as exc:
+            print(f"⚠️ Revenue summary unavailable: {exc}")
+    return app.templates.TemplateResponse("admin/dashboard.html", {"request": request, "summary": summary})
+
+# DB pool usage (admin only)
+@app.get("/admin/db/pool")
+async def admin_db_pool(request: Request):
+    if not request.session.get("is_admin"):
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    if not request.app.state.db_available or request.app.state.pool_stats is None:
+        return JSONResponse({"error": "database unavailable"}, status_code=503)
+    try:
+        return await request.app.state.pool_stats()
+    except Exception as exc:
+        return JSONResponse({"error": str(exc)}, status_code=500)
 
 app.include_router(home_routes.router)
 app.include_router(about.router)
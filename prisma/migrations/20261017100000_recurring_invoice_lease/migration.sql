@@ -0,0 +1,3 @@
+-- AlterTable
+ALTER TABLE "RecurringInvoice" ADD COLUMN     "leaseOwner" TEXT,
+ADD COLUMN     "leaseUntil" TIMESTAMP(3);
@@ -0,0 +1,20 @@
+-- CreateIndex
+CREATE INDEX "User_role_idx" ON "User"("role");
+
+-- CreateIndex
+CREATE INDEX "User_createdAt_id_idx" ON "User"("createdAt", "id");
+
+-- CreateIndex
+CREATE INDEX "Invoice_clientId_createdAt_idx" ON "Invoice"("clientId", "createdAt");
+
+-- CreateIndex
+CREATE INDEX "Invoice_createdAt_id_idx" ON "Invoice"("createdAt", "id");
+
+-- CreateIndex
+CREATE INDEX "Invoice_invoiceDate_idx" ON "Invoice"("invoiceDate");
+
+-- CreateIndex
+CREATE INDEX "Service_invoiceId_idx" ON "Service"("invoiceId");
+
+-- CreateIndex
+CREATE INDEX "RecurringInvoice_nextRun_idx" ON "RecurringInvoice"("nextRun");
@@ -0,0 +1,45 @@
+-- CreateTable
+CREATE TABLE "RevenueSummary" (
+    "kind" TEXT NOT NULL,
+    "key" TEXT NOT NULL,
+    "invoiced" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "sent" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "invoices" INTEGER NOT NULL DEFAULT 0,
+    "mrr" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "lastInvoiceAt" TIMESTAMP(3),
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "RevenueSummary_pkey" PRIMARY KEY ("kind","key")
+);
+
+-- CreateIndex
+CREATE INDEX "RevenueSummary_kind_invoiced_idx" ON "RevenueSummary"("kind", "invoiced");
+
+-- Backfill from existing invoices and recurring schedules
+INSERT INTO "RevenueSummary" ("kind", "key", "invoiced", "sent", "invoices", "lastInvoiceAt", "updatedAt")
+SELECT 'all', '', COALESCE(SUM("total"), 0), COALESCE(SUM(CASE WHEN "sent" THEN "total" ELSE 0 END), 0),
+       COUNT(*), MAX("invoiceDate"), CURRENT_TIMESTAMP
+FROM "Invoice";
+
+INSERT INTO "RevenueSummary" ("kind", "key", "invoiced", "sent", "invoices", "lastInvoiceAt", "updatedAt")
+SELECT 'month', to_char("invoiceDate", 'YYYY-MM'), SUM("total"),
+       SUM(CASE WHEN "sent" THEN "total" ELSE 0 END), COUNT(*), MAX("invoiceDate"), CURRENT_TIMESTAMP
+FROM "Invoice" GROUP BY 2;
+
+INSERT INTO "RevenueSummary" ("kind", "key", "invoiced", "sent", "invoices", "lastInvoiceAt", "updatedAt")
+SELECT 'client', "clientId", SUM("total"),
+       SUM(CASE WHEN "sent" THEN "total" ELSE 0 END), COUNT(*), MAX("invoiceDate"), CURRENT_TIMESTAMP
+FROM "Invoice" GROUP BY "clientId";
+
+UPDATE "RevenueSummary" s SET "mrr" = m."mrr"
+FROM (
+    SELECT i."clientId",
+           SUM(CASE WHEN lower(r."frequency") = 'annual' THEN i."total" / 12 ELSE i."total" END) AS "mrr"
+    FROM "RecurringInvoice" r JOIN "Invoice" i ON i."id" = r."invoiceId"
+    GROUP BY i."clientId"
+) m
+WHERE s."kind" = 'client' AND s."key" = m."clientId";
+
+UPDATE "RevenueSummary"
+SET "mrr" = (SELECT COALESCE(SUM("mrr"), 0) FROM "RevenueSummary" WHERE "kind" = 'client')
+WHERE "kind" = 'all';
@@ -0,0 +1,14 @@
+-- CreateExtension
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+
+-- CreateIndex
+CREATE INDEX "User_name_idx" ON "User" USING GIN ("name" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "User_surname_idx" ON "User" USING GIN ("surname" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "User_email_idx" ON "User" USING GIN ("email" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "User_phone_idx" ON "User" USING GIN ("phone" gin_trgm_ops);
@@ -0,0 +1,6 @@
+-- AlterTable
+ALTER TABLE "OutboundEmail" ADD COLUMN     "invoiceId" TEXT,
+ADD COLUMN     "messageId" TEXT;
+
+-- CreateIndex
+CREATE INDEX "OutboundEmail_invoiceId_idx" ON "OutboundEmail"("invoiceId");
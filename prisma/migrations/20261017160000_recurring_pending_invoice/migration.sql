@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE "RecurringInvoice" ADD COLUMN     "pendingInvoiceId" TEXT;
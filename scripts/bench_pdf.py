@@ -0,0 +1,97 @@
+# scripts/bench_pdf.py
+"""
+Per-invoice PDF cost across engines:
+  - WeasyPrint with a fresh HTML, inlined stylesheet and no shared font/image state (the old html_to_pdf)
+  - WeasyPrint through the long-lived InvoiceRenderer
+  - ReportLab (app.core.pdf_reportlab)
+
+    python scripts/bench_pdf.py --docs 30 --services 12
+    python scripts/bench_pdf.py --engines reportlab       # no WeasyPrint installed
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app.core.pdf_reportlab import render_invoice_pdf as reportlab_pdf  # noqa: E402
+from app.core.pdf_utils2 import INVOICE_CSS, InvoiceRenderer, render_invoice_html  # noqa: E402
+
+
+def _context(i: int, services: int) -> dict:
+    today = datetime(2026, 1, 1) + timedelta(days=i)
+    rows = [{"description": f"Service line {n}", "price": 40.0 + n} for n in range(services)]
+    return {
+        "invoice": SimpleNamespace(id=f"bench{i:06d}", invoiceDate=today),
+        "client": SimpleNamespace(name="Ada", surname=f"Client {i}", email=f"ada{i}@example.com",
+                                  phone="07000000000", address="1 Example Street"),
+        "services": rows,
+        "total": sum(r["price"] for r in rows),
+        "issue_date": today.strftime("%Y-%m-%d"),
+        "due_date": (today + timedelta(days=14)).strftime("%Y-%m-%d"),
+        "company_name": "Dynastra Tech", "company_email": "billing@example.com",
+        "company_site": "example.com", "company_phone": "020 0000 0000",
+        "account_name": "Dynastra Tech", "sort_code": "00-00-00", "account_number": "12345678",
+        "iban": "", "logo_url": "/static/logos/dynastra_dark.png", "notes": "Thank you!",
+    }
+
+
+def _legacy(html: str, out_path: str) -> None:
+    from weasyprint import HTML
+    inline = html.replace("</head>", f"<style>{INVOICE_CSS}</style></head>", 1)
+    HTML(string=inline, base_url=(ROOT / "app" / "static").as_uri()).write_pdf(out_path)
+
+
+def _time(fn, items: list, out_dir: str) -> list[float]:
+    samples = []
+    for n, item in enumerate(items):
+        t0 = time.perf_counter()
+        fn(item, f"{out_dir}/{n}.pdf")
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--docs", type=int, default=20)
+    ap.add_argument("--services", type=int, default=8, help="service lines per invoice")
+    ap.add_argument("--engines", default="weasyprint,reportlab")
+    args = ap.parse_args()
+    engines = {e.strip() for e in args.engines.split(",")}
+
+    contexts = [_context(i, args.services) for i in range(args.docs)]
+    results: dict[str, list[float]] = {}
+    with tempfile.TemporaryDirectory() as out_dir:
+        if "weasyprint" in engines:
+            htmls = [render_invoice_html(ctx) for ctx in contexts]
+            _legacy(htmls[0], f"{out_dir}/warmup.pdf")   # import + first-use costs out of the runs
+            results["weasyprint, fresh HTML"] = _time(_legacy, htmls, out_dir)
+            renderer = InvoiceRenderer()
+            results["weasyprint, shared renderer"] = _time(renderer.write_pdf, htmls, out_dir)
+        if "reportlab" in engines:
+            reportlab_pdf(contexts[0], f"{out_dir}/warmup.pdf")
+            results["reportlab"] = _time(reportlab_pdf, contexts, out_dir)
+
+    if not results:
+        print("Nothing to run; --engines takes weasyprint and/or reportlab.")
+        return 2
+    baseline = statistics.median(next(iter(results.values())))
+    print(f"{args.docs} invoices × {args.services} lines")
+    width = max(len(name) for name in results)
+    for name, samples in results.items():
+        med = statistics.median(samples)
+        print(f"  {name.ljust(width)} : median {med:7.1f} ms/doc  total {sum(samples):8.0f} ms  "
+              f"{baseline / med if med else float('inf'):6.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
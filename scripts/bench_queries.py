@@ -0,0 +1,144 @@
+# scripts/bench_queries.py
+"""
+Before/after latency of the app's hot queries with and without the
+20261017120000_hot_path_indexes indexes.
+
+Seeds a synthetic dataset into a throw-away schema (never touches "public"),
+times each query without secondary indexes, creates the indexes, ANALYZEs,
+times again and drops the schema.
+
+    BENCH_DATABASE_URL=postgresql://... python scripts/bench_queries.py --clients 20000 --invoices 40
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import psycopg2
+
+ROOT = Path(__file__).resolve().parents[1]
+INDEX_MIGRATION = ROOT / "prisma" / "migrations" / "20261017120000_hot_path_indexes" / "migration.sql"
+TABLES = ("User", "Invoice", "Service", "RecurringInvoice")
+
+QUERIES = {
+    "invoices for client (clientId, createdAt desc)":
+        'SELECT * FROM "Invoice" WHERE "clientId" = %(client_id)s ORDER BY "createdAt" DESC',
+    "invoice list first page (createdAt, id)":
+        'SELECT * FROM "Invoice" ORDER BY "createdAt" DESC, "id" DESC LIMIT 26',
+    "invoices in a quarter (invoiceDate range)":
+        'SELECT * FROM "Invoice" WHERE "invoiceDate" >= %(q_start)s AND "invoiceDate" < %(q_end)s',
+    "due recurring (nextRun <= now)":
+        'SELECT * FROM "RecurringInvoice" WHERE "nextRun" <= now() - interval \'300 days\'',
+    "users by role":
+        'SELECT * FROM "User" WHERE "role" = \'ADMIN\'',
+    "services join (invoiceId)":
+        'SELECT s.* FROM "Service" s WHERE s."invoiceId" = %(invoice_id)s',
+}
+
+
+def _seed(cur, schema: str, clients: int, per_client: int) -> None:
+    cur.execute(f'CREATE SCHEMA "{schema}"')
+    cur.execute(f'SET search_path TO "{schema}", public')
+    for t in TABLES:
+        # LIKE copies columns/defaults but no indexes → the "before" state.
+        cur.execute(f'CREATE TABLE "{t}" (LIKE public."{t}" INCLUDING DEFAULTS)')
+        cur.execute(f'ALTER TABLE "{t}" ADD PRIMARY KEY ("id")')
+
+    cur.execute("""
+        INSERT INTO "User" ("id","role","name","surname","phone","email","tasks","createdAt","updatedAt")
+        SELECT 'u' || g,
+               (CASE WHEN g %% 1000 = 0 THEN 'ADMIN' ELSE 'CLIENT' END)::public."Role",
+               'Name' || g, 'Surname' || g, '07' || g, 'user' || g || '@example.com', '{}',
+               now() - (g || ' minutes')::interval, now()
+        FROM generate_series(1, %s) g
+    """, (clients,))
+    cur.execute("""
+        INSERT INTO "Invoice" ("id","clientId","invoiceType","invoiceDate","dueDate","total",
+                               "accountName","sortCode","accountNumber","sent","createdAt","updatedAt")
+        SELECT 'i' || c || '-' || n, 'u' || c, 'ONE_TIME',
+               now() - ((c * n) %% 1000 || ' days')::interval,
+               now() - ((c * n) %% 1000 - 14 || ' days')::interval,
+               (c %% 500) + n, 'Acme', '00-00-00', '12345678', n %% 2 = 0,
+               now() - ((c * n) %% 100000 || ' minutes')::interval, now()
+        FROM generate_series(1, %s) c, generate_series(1, %s) n
+    """, (clients, per_client))
+    cur.execute("""
+        INSERT INTO "Service" ("id","invoiceId","description","price")
+        SELECT i."id" || '-s' || k, i."id", 'Line ' || k, k * 10
+        FROM "Invoice" i, generate_series(1, 3) k
+    """)
+    cur.execute("""
+        INSERT INTO "RecurringInvoice" ("id","invoiceId","frequency","nextRun")
+        SELECT 'r' || i."id", i."id", 'monthly', i."invoiceDate" + interval '30 days'
+        FROM "Invoice" i WHERE i."id" LIKE '%%-1'
+    """)
+    cur.execute("ANALYZE")
+
+
+def _time(cur, sql: str, params: dict, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        cur.execute(sql, params)
+        cur.fetchall()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def _run_all(cur, params: dict, repeat: int) -> dict[str, float]:
+    return {name: _time(cur, sql, params, repeat) for name, sql in QUERIES.items()}
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"))
+    ap.add_argument("--clients", type=int, default=10_000)
+    ap.add_argument("--invoices", type=int, default=20, help="invoices per client")
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--keep", action="store_true", help="keep the bench schema afterwards")
+    args = ap.parse_args()
+
+    if not args.database_url:
+        print("Set BENCH_DATABASE_URL (or --database-url); DATABASE_URL is not used on purpose.")
+        return 2
+
+    schema = f"bench_{int(time.time())}"
+    conn = psycopg2.connect(args.database_url)
+    conn.autocommit = True
+    cur = conn.cursor()
+    try:
+        t0 = time.perf_counter()
+        _seed(cur, schema, args.clients, args.invoices)
+        print(f"Seeded {args.clients} clients × {args.invoices} invoices into {schema} "
+              f"in {time.perf_counter() - t0:.1f}s")
+
+        params = {
+            "client_id": f"u{args.clients // 2}",
+            "invoice_id": f"i{args.clients // 2}-1",
+            "q_start": "2025-01-01",
+            "q_end": "2025-04-01",
+        }
+        before = _run_all(cur, params, args.repeat)
+
+        cur.execute(INDEX_MIGRATION.read_text(encoding="utf-8"))
+        cur.execute("ANALYZE")
+        after = _run_all(cur, params, args.repeat)
+
+        width = max(len(n) for n in QUERIES)
+        print(f"\n{'query'.ljust(width)}  {'before ms':>10}  {'after ms':>10}  {'speedup':>8}")
+        for name in QUERIES:
+            b, a = before[name], after[name]
+            print(f"{name.ljust(width)}  {b:10.2f}  {a:10.2f}  {b / a if a else float('inf'):7.1f}x")
+    finally:
+        if not args.keep:
+            cur.execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
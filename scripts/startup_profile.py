@@ -0,0 +1,94 @@
+# scripts/startup_profile.py
+"""
+Cold-start report and budget check for `import main` (what Vercel pays on every cold start).
+
+    python scripts/startup_profile.py               # top imports by cumulative time
+    python scripts/startup_profile.py --check       # exit 1 if over budget / heavy module loaded
+
+Each sample runs in a fresh interpreter with `-X importtime`. --check fails when the
+median import time exceeds STARTUP_BUDGET_MS (default 1500) or when a module that must
+load lazily (WeasyPrint, resend, ReportLab, APScheduler) is imported at startup.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1500"))
+MUST_BE_LAZY = ("weasyprint", "resend", "reportlab", "apscheduler")
+
+_PROBE = (
+    "import sys, time; t = time.perf_counter(); import main; "
+    "print('elapsed_ms', (time.perf_counter() - t) * 1000); "
+    "print('modules', ' '.join(sorted(sys.modules)))"
+)
+
+
+def _sample() -> tuple[float, set[str], list[tuple[int, int, str]]]:
+    """One cold `import main`: (wall ms, loaded modules, [(self us, cumulative us, module)])."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr[-4000:])
+        raise SystemExit(f"`import main` failed with exit code {proc.returncode}")
+
+    elapsed, modules = 0.0, set()
+    for line in proc.stdout.splitlines():
+        if line.startswith("elapsed_ms "):
+            elapsed = float(line.split()[1])
+        elif line.startswith("modules "):
+            modules = set(line.split()[1:])
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    return elapsed, modules, rows
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--check", action="store_true", help="enforce the budget (for CI)")
+    ap.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=25)
+    args = ap.parse_args()
+
+    samples = [_sample() for _ in range(max(1, args.runs))]
+    median_ms = statistics.median(s[0] for s in samples)
+    _, modules, rows = samples[-1]
+
+    print(f"import main: median {median_ms:.0f} ms over {len(samples)} cold runs "
+          f"({len(modules)} modules loaded)")
+    if not args.check:
+        # Everything `main` pulled in, ranked by cumulative time (parents include children).
+        top = sorted((r for r in rows if r[2] != "main"), key=lambda r: r[1], reverse=True)[: args.top]
+        print(f"\n{'cumulative ms':>14}  {'self ms':>8}  module")
+        for self_us, cumulative_us, name in top:
+            print(f"{cumulative_us / 1000:14.1f}  {self_us / 1000:8.1f}  {name}")
+
+    eager = sorted(m for m in modules if m.split(".")[0] in MUST_BE_LAZY)
+    failed = False
+    if eager:
+        print(f"\n✗ loaded at startup but should be lazy: {', '.join(eager)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"✗ over budget: {median_ms:.0f} ms > {args.budget_ms:.0f} ms")
+        failed = True
+    if args.check and not failed:
+        print(f"✓ within budget ({args.budget_ms:.0f} ms)")
+    return 1 if args.check and failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())